@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import (Alert, Earthquake, Flood, Tornado, Fire, AlertUserVote)
+from .models import (Alert, Earthquake, Flood, Tornado, Fire, AlertUserVote,
+                     GeocodedLocation, AdminBoundary, PendingVoteDelta,
+                     AlertTombstone)
 
 
 @admin.register(Alert)
@@ -48,3 +50,30 @@ class AlertUserVoteAdmin(admin.ModelAdmin):
     list_display = ('alert', 'user', 'vote')
     search_fields = ('alert', 'user')
     list_filter = ('vote',)
+
+
+@admin.register(GeocodedLocation)
+class GeocodedLocationAdmin(admin.ModelAdmin):
+    list_display = ('geohash', 'created_at')
+    search_fields = ('geohash',)
+    list_filter = ('created_at',)
+
+
+@admin.register(AdminBoundary)
+class AdminBoundaryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'level')
+    search_fields = ('name',)
+    list_filter = ('level',)
+
+
+@admin.register(PendingVoteDelta)
+class PendingVoteDeltaAdmin(admin.ModelAdmin):
+    list_display = ('alert', 'positive', 'negative', 'created_at')
+    list_filter = ('created_at',)
+
+
+@admin.register(AlertTombstone)
+class AlertTombstoneAdmin(admin.ModelAdmin):
+    list_display = ('alert_id', 'deleted_at')
+    search_fields = ('alert_id',)
+    list_filter = ('deleted_at',)
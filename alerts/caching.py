@@ -0,0 +1,206 @@
+# Python Imports
+import hashlib
+import logging
+import time
+from functools import wraps
+
+# Library Imports
+import redis
+
+# Django Imports
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+# Local Imports
+from .models import Alert, AlertTombstone
+
+logger = logging.getLogger(__name__)
+
+ALERT_DATA_VERSION_KEY = "alert_data_version"
+
+
+def alert_data_state(request):
+    """
+    Return (last_modified, last_tombstone_id) for the alert data.
+
+    * Every change to an alert bumps its `updated_at` and every delete adds a
+      tombstone, so these two values change whenever the data does.
+    * Both are read from indexes, which makes them far cheaper than building
+      the response. The result is kept on the request, it is used for both the
+      ETag and the Last-Modified header.
+    """
+    if not hasattr(request, '_alert_data_state'):
+        last_updated = Alert.objects.aggregate(last=Max('updated_at'))['last']
+        tombstone = AlertTombstone.objects.order_by('-id').values_list(
+            'id', 'deleted_at').first()
+        tombstone_id, last_deleted = tombstone or (0, None)
+        last_modified = max(filter(None, [last_updated, last_deleted]), default=None)
+        request._alert_data_state = (last_modified, tombstone_id)
+    return request._alert_data_state
+
+
+def alert_data_etag(request, *args, **kwargs):
+    """
+    ETag of an alert read endpoint: the alert data state and version, the
+    full path (query parameters included) and the requested media type.
+
+    * A write that commits after a newer one keeps Max(updated_at) as it was,
+      but it bumps the data version when it commits, so the ETag changes.
+      Clients polling with If-Modified-Since only can miss such a write.
+    * Without the cache, the version is left out and the ETag only follows
+      Max(updated_at) and the last tombstone.
+    """
+    last_modified, tombstone_id = alert_data_state(request)
+    version = alert_data_version()
+    validator = ':'.join([
+        last_modified.isoformat() if last_modified else '',
+        str(tombstone_id),
+        str(version) if version is not None else '',
+        request.get_full_path(),
+        request.META.get('HTTP_ACCEPT', ''),
+    ])
+    return hashlib.md5(validator.encode()).hexdigest()
+
+
+def alert_data_last_modified(request, *args, **kwargs):
+    """
+    Last-Modified date of an alert read endpoint.
+    """
+    return alert_data_state(request)[0]
+
+
+# Conditional GET for the alert read views: a request with a matching
+# If-None-Match or If-Modified-Since header gets a 304 without running the view.
+conditional_alert_get = method_decorator(
+    condition(etag_func=alert_data_etag, last_modified_func=alert_data_last_modified),
+    name='get')
+
+
+def alert_data_version():
+    """
+    Current version of the alert data, shared by every process.
+
+    * Starts from the current time, so a version lost by the cache backend
+      never comes back to a value used before.
+    * Returns None when the cache is down.
+    """
+    try:
+        return cache.get_or_set(ALERT_DATA_VERSION_KEY, time.time_ns, None)
+    except redis.RedisError:
+        logger.warning("Cache unavailable, could not read the alert data version")
+        return None
+
+
+def _incr_alert_data_version():
+    try:
+        try:
+            cache.incr(ALERT_DATA_VERSION_KEY)
+        except ValueError:
+            cache.set(ALERT_DATA_VERSION_KEY, time.time_ns(), None)
+    except redis.RedisError:
+        logger.warning("Cache unavailable, could not bump the alert data version")
+
+
+def bump_alert_data_version():
+    """
+    Invalidate the cached alert responses.
+
+    * Called by the signals of the alert models and after bulk updates that
+      skip the signals (vote counters, expiry).
+    * Bumped again when the transaction commits, so a response cached from
+      data read before the commit is not kept under the new version.
+    * A cache failure is only logged, it never fails the write.
+    """
+    _incr_alert_data_version()
+    transaction.on_commit(_incr_alert_data_version)
+
+
+def alert_response_cache_key(request):
+    """
+    Cache key of a rendered response: the alert data version, the full path
+    (query parameters included) and the requested media type.
+
+    * Returns None when the cache is down.
+    """
+    version = alert_data_version()
+    if version is None:
+        return None
+    request_key = hashlib.md5(':'.join([
+        request.get_full_path(),
+        request.META.get('HTTP_ACCEPT', ''),
+    ]).encode()).hexdigest()
+    return f"alert_response:{version}:{request_key}"
+
+
+def _store_response(key, body, content_type):
+    try:
+        cache.set(key, (body, content_type), settings.ALERT_RESPONSE_CACHE_TTL)
+    except redis.RedisError:
+        logger.warning("Cache unavailable, could not store the alert response")
+
+
+def _cache_stream(key, chunks, content_type):
+    """
+    Pass the chunks of a streamed response through and cache the whole body
+    at the end, unless it is larger than ALERT_RESPONSE_CACHE_MAX_BYTES.
+    """
+    body = []
+    size = 0
+    for chunk in chunks:
+        if body is not None:
+            body.append(chunk)
+            size += len(chunk)
+            if size > settings.ALERT_RESPONSE_CACHE_MAX_BYTES:
+                body = None
+        yield chunk
+    if body is not None:
+        _store_response(key, b''.join(body), content_type)
+
+
+def cache_alert_response(view_func):
+    """
+    Serve the rendered body of an alert read view from the shared cache.
+
+    * Entries are keyed by the alert data version, so every change to the
+      alerts makes the next request rebuild the response once.
+    * Only successful responses are cached.
+    * The view is served uncached while the cache is down.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = alert_response_cache_key(request)
+        if key is None:
+            return view_func(request, *args, **kwargs)
+        try:
+            cached = cache.get(key)
+        except redis.RedisError:
+            logger.warning("Cache unavailable, serving the alert response uncached")
+            return view_func(request, *args, **kwargs)
+        if cached is not None:
+            body, content_type = cached
+            return HttpResponse(body, content_type=content_type)
+
+        response = view_func(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+
+        if response.streaming:
+            response.streaming_content = _cache_stream(
+                key, response.streaming_content, response['Content-Type'])
+        else:
+            # DRF responses are rendered after the view returns
+            def store(rendered):
+                if len(rendered.content) <= settings.ALERT_RESPONSE_CACHE_MAX_BYTES:
+                    _store_response(key, rendered.content, rendered['Content-Type'])
+            response.add_post_render_callback(store)
+        return response
+    return wrapper
+
+
+# Versioned response cache for the alert read views.
+cached_alert_get = method_decorator(cache_alert_response, name='get')
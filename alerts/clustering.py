@@ -0,0 +1,74 @@
+# Python Imports
+import math
+
+# Django Imports
+from django.db import connection
+
+# Local Imports
+from .models import Alert
+
+# Size of a cluster cell on screen, in pixels of a 256px map tile.
+CLUSTER_CELL_PIXELS = 64
+# From this zoom level on, alerts are returned one by one.
+CLUSTER_MAX_ZOOM = 16
+# Maximum number of clusters (or alerts) returned for one request.
+MAX_CLUSTERS = 1000
+
+CLUSTER_SQL = """
+    SELECT COUNT(*) AS count,
+           ST_X(ST_Centroid(ST_Collect(alert.location::geometry))) AS lng,
+           ST_Y(ST_Centroid(ST_Collect(alert.location::geometry))) AS lat,
+           MODE() WITHIN GROUP (ORDER BY alert.hazard_type) AS hazard_type,
+           MIN(alert.id) AS alert_id
+    FROM {alert_table} alert
+    WHERE alert.is_active
+      AND alert.location::geometry && ST_MakeEnvelope(%s, %s, %s, %s, 4326)
+    GROUP BY {group_by}
+    ORDER BY count DESC
+    LIMIT %s
+"""
+
+
+def cluster_grid_size(bbox, zoom):
+    """
+    Size in degrees of the grid cells used to cluster the alerts of a bbox.
+
+    * A cell covers CLUSTER_CELL_PIXELS on screen at the given zoom.
+    * Cells are enlarged if the bbox would hold more than MAX_CLUSTERS cells,
+      so the payload stays bounded whatever bbox and zoom are sent.
+    """
+    min_lng, min_lat, max_lng, max_lat = bbox
+    grid_size = 360 * CLUSTER_CELL_PIXELS / (256 * 2 ** zoom)
+    area = (max_lng - min_lng) * (max_lat - min_lat)
+    return max(grid_size, math.sqrt(area / MAX_CLUSTERS))
+
+
+def cluster_alerts(bbox, zoom):
+    """
+    Cluster the active alerts inside a bbox (min_lng, min_lat, max_lng, max_lat).
+
+    * The bbox is compared in planar lng/lat space (`alert_location_geom_idx`),
+      a geography envelope would turn its edges into great circle arcs and
+      break for bboxes of 180 degrees or more of longitude.
+    * Below CLUSTER_MAX_ZOOM, alerts are grouped in the database with
+      `ST_SnapToGrid`, each cluster has its alert count, centroid and
+      dominant hazard type (the denormalized `hazard_type` column).
+    * From CLUSTER_MAX_ZOOM on, every alert is its own cluster.
+    * Returns a list of dicts, at most MAX_CLUSTERS, largest clusters first.
+    """
+    params = list(bbox)
+    if zoom >= CLUSTER_MAX_ZOOM:
+        group_by = "alert.id"
+    else:
+        group_by = "ST_SnapToGrid(alert.location::geometry, %s)"
+        params.append(cluster_grid_size(bbox, zoom))
+    params.append(MAX_CLUSTERS)
+
+    sql = CLUSTER_SQL.format(
+        alert_table=connection.ops.quote_name(Alert._meta.db_table),
+        group_by=group_by,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
@@ -0,0 +1,206 @@
+# Python Imports
+import csv
+import io
+import json
+import struct
+from datetime import timezone as dt_timezone
+from itertools import islice
+
+# Django Imports
+from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.utils.encoders import JSONEncoder
+
+# Local Imports
+from .ingest import HAZARD_MODEL_MAPPING
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Optional, only needed for the GeoParquet export
+    pyarrow = None
+
+EXPORT_FORMATS = ('ndjson', 'csv', 'geoparquet')
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'geoparquet': 'application/vnd.apache.parquet',
+}
+EXPORT_EXTENSIONS = {'ndjson': 'ndjson', 'csv': 'csv', 'geoparquet': 'parquet'}
+
+# Alert columns of the export, `lat`/`lng` come from the location
+ALERT_COLUMNS = (
+    'id', 'lat', 'lng', 'effect_radius', 'description', 'hazard_type',
+    'created_at', 'updated_at', 'soft_deletion_time', 'country', 'city', 'county',
+    'reported_by', 'source_url', 'positive_votes', 'negative_votes', 'is_active',
+)
+# Hazard fields flattened into their own columns, same names as in hazard_data
+HAZARD_FIELDS = {}
+for _model_class in HAZARD_MODEL_MAPPING.values():
+    for _field in _model_class._meta.concrete_fields:
+        if not _field.primary_key:
+            HAZARD_FIELDS.setdefault(_field.name, _field)
+HAZARD_COLUMNS = tuple(HAZARD_FIELDS)
+EXPORT_COLUMNS = ALERT_COLUMNS + HAZARD_COLUMNS
+
+QUERY_FIELDS = (
+    'id', 'location', 'effect_radius', 'description', 'hazard_type', 'hazard_data',
+    'created_at', 'updated_at', 'soft_deletion_time', 'country', 'city', 'county',
+    'reported_by__username', 'source_url', 'positive_votes', 'negative_votes', 'is_active',
+)
+
+
+def filter_export_queryset(queryset, params):
+    """
+    Apply the export filters found in `params` (query parameters or options).
+
+    * `hazard_type`, `country`, `active` (true/false) and `since`/`until`
+      on the creation date. Dates without an offset are read as UTC.
+    * Raises ValueError if a filter value is invalid.
+    """
+    if params.get('hazard_type'):
+        queryset = queryset.filter(hazard_type=params['hazard_type'].lower())
+    if params.get('country'):
+        queryset = queryset.filter(country__iexact=params['country'])
+    if params.get('active') not in (None, ''):
+        active = str(params['active']).lower()
+        if active not in ('true', 'false', '1', '0'):
+            raise ValueError("active must be true or false.")
+        queryset = queryset.filter(is_active=active in ('true', '1'))
+    for param, lookup in (('since', 'created_at__gte'), ('until', 'created_at__lt')):
+        if params.get(param):
+            value = parse_datetime(params[param])
+            if value is None:
+                raise ValueError(f"{param} must be an ISO 8601 date and time.")
+            if timezone.is_naive(value):
+                value = timezone.make_aware(value, dt_timezone.utc)
+            queryset = queryset.filter(**{lookup: value})
+    return queryset
+
+
+def export_rows(queryset, chunk_size=2000):
+    """
+    Yield the alerts of the queryset as flat dicts of the export columns.
+
+    * Rows are read with a server-side cursor, `chunk_size` at a time, and
+      without building model instances.
+    * Hazard fields missing from an alert's hazard data are None.
+    """
+    alerts = queryset.order_by('id').values(*QUERY_FIELDS).iterator(chunk_size=chunk_size)
+    for alert in alerts:
+        location = alert.pop('location')
+        hazard_data = alert.pop('hazard_data') or {}
+        alert['reported_by'] = alert.pop('reported_by__username')
+        alert['lat'], alert['lng'] = location.y, location.x
+        for column in HAZARD_COLUMNS:
+            alert[column] = hazard_data.get(column)
+        yield alert
+
+
+def row_chunks(rows, chunk_size):
+    """
+    Group rows into lists of at most `chunk_size`.
+    """
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def stream_ndjson(queryset, chunk_size=2000):
+    """
+    Yield the alerts as newline delimited GeoJSON features, one chunk at a time.
+
+    * The hazard fields of the alert are flattened into the properties.
+    """
+    encoder = JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+    for chunk in row_chunks(export_rows(queryset, chunk_size), chunk_size):
+        lines = []
+        for row in chunk:
+            lng, lat = row.pop('lng'), row.pop('lat')
+            properties = {key: value for key, value in row.items()
+                          if value is not None or key not in HAZARD_FIELDS}
+            lines.append(encoder.encode({
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [lng, lat]},
+                'properties': properties,
+            }))
+        yield '\n'.join(lines) + '\n'
+
+
+def stream_csv(queryset, chunk_size=2000):
+    """
+    Yield the alerts as CSV with a header row, one chunk at a time.
+
+    * Dates are written in ISO 8601, missing values as empty cells.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in row_chunks(export_rows(queryset, chunk_size), chunk_size):
+        for row in chunk:
+            writer.writerow([
+                row[column].isoformat() if hasattr(row[column], 'isoformat') else row[column]
+                for column in EXPORT_COLUMNS
+            ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # An empty export still has its header
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def geoparquet_schema():
+    """
+    Build the pyarrow schema of the GeoParquet export.
+
+    * The point is stored as WKB in the `geometry` column, described in the
+      `geo` metadata (GeoParquet 1.0, WGS84).
+    """
+    types = {
+        'id': pyarrow.int64(), 'lat': pyarrow.float64(), 'lng': pyarrow.float64(),
+        'effect_radius': pyarrow.int64(), 'positive_votes': pyarrow.int64(),
+        'negative_votes': pyarrow.int64(), 'is_active': pyarrow.bool_(),
+        'created_at': pyarrow.timestamp('us', tz='UTC'),
+        'updated_at': pyarrow.timestamp('us', tz='UTC'),
+        'soft_deletion_time': pyarrow.timestamp('us', tz='UTC'),
+    }
+    for column, field in HAZARD_FIELDS.items():
+        if isinstance(field, models.DecimalField):
+            types[column] = pyarrow.float64()
+        elif isinstance(field, models.BooleanField):
+            types[column] = pyarrow.bool_()
+
+    fields = [pyarrow.field(column, types.get(column, pyarrow.string()))
+              for column in EXPORT_COLUMNS]
+    fields.append(pyarrow.field('geometry', pyarrow.binary()))
+    geo = {
+        'version': '1.0.0',
+        'primary_column': 'geometry',
+        'columns': {'geometry': {'encoding': 'WKB', 'geometry_types': ['Point']}},
+    }
+    return pyarrow.schema(fields, metadata={'geo': json.dumps(geo)})
+
+
+def write_geoparquet(queryset, output, chunk_size=2000):
+    """
+    Write the alerts to `output` (a path or binary file) as GeoParquet.
+
+    * Each chunk is written as its own row group, so memory use does not
+      grow with the number of alerts.
+    * Columns are compressed with zstd.
+    * Raises RuntimeError if pyarrow is not installed.
+    """
+    if pyarrow is None:
+        raise RuntimeError("The GeoParquet export requires pyarrow.")
+
+    schema = geoparquet_schema()
+    with pyarrow.parquet.ParquetWriter(output, schema, compression='zstd') as writer:
+        for chunk in row_chunks(export_rows(queryset, chunk_size), chunk_size):
+            for row in chunk:
+                # WKB of a little endian 2D point
+                row['geometry'] = struct.pack('<BIdd', 1, 1, row['lng'], row['lat'])
+            writer.write_table(pyarrow.Table.from_pylist(chunk, schema=schema))
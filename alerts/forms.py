@@ -218,5 +218,6 @@ class AlertForm(forms.ModelForm):
             hazard.save()
 
         if commit:
-            alert.save()
+            # Only the edited fields: the vote counters may be changing concurrently
+            alert.save(update_fields=[*self._meta.fields, 'updated_at'])
         return alert
@@ -0,0 +1,184 @@
+# Python Imports
+import logging
+import threading
+from collections import OrderedDict
+
+# Library Imports
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.gis.geos import Point
+from geopy.geocoders import Nominatim
+
+# Local Imports
+from .models import GeocodedLocation, AdminBoundary
+
+logger = logging.getLogger(__name__)
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Cache hit counters shared by all the processes (web and Celery workers)
+GEOCODING_STATS_KEY = "geocoding_stats:"
+GEOCODING_COUNTERS = ('memory_hits', 'database_hits', 'misses')
+
+
+def geohash_encode(lat, lng, precision):
+    """
+    Encode a coordinate into a geohash string of the given precision.
+
+    * Nearby coordinates share the same cell, e.g. precision 6 is
+      roughly a 1.2 km x 0.6 km cell.
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    geohash = []
+    bits, bit_count, even = 0, 0, True
+
+    while len(geohash) < precision:
+        value_range, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (value_range[0] + value_range[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            value_range[0] = mid
+        else:
+            bits = bits << 1
+            value_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(geohash)
+
+
+class ReverseGeocoder:
+    """
+    Reverse geocoding service with a two level cache in front of Nominatim.
+
+    * Coordinates are snapped to a geohash cell.
+    * An in-process LRU is checked first, then the persistent
+      `GeocodedLocation` table, and only then the network.
+    * Hit counters are kept in the shared cache, for all the processes, so
+      the cache hit ratio can be inspected (`manage.py geocoding_stats`).
+    * With the "boundaries" backend, addresses come from a point-in-polygon
+      lookup on the local `AdminBoundary` table and Nominatim is never called.
+    """
+
+    def __init__(self, precision=None, lru_size=None, user_agent="enviroalerts",
+                 backend=None):
+        self.backend = backend
+        self.precision = precision or getattr(settings, 'GEOCODING_GEOHASH_PRECISION', 6)
+        self.lru_size = lru_size or getattr(settings, 'GEOCODING_LRU_SIZE', 1024)
+        self.user_agent = user_agent
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reverse(self, lat, lng):
+        """
+        Return the address details (country, city, county...) for a coordinate.
+
+        * Errors from the upstream geocoder are raised to the caller and
+          never cached.
+        """
+        backend = self.backend or getattr(settings, 'GEOCODING_BACKEND', 'nominatim')
+        if backend == 'boundaries':
+            return self.lookup_boundaries(lat, lng)
+
+        geohash = geohash_encode(float(lat), float(lng), self.precision)
+
+        with self._lock:
+            if geohash in self._lru:
+                self._lru.move_to_end(geohash)
+                address = dict(self._lru[geohash])
+            self._count('memory_hits')
+            return address
+
+        cached = GeocodedLocation.objects.filter(
+            geohash=geohash).values_list('address', flat=True).first()
+        if cached is not None:
+            self._count('database_hits')
+            self._remember(geohash, cached)
+            return dict(cached)
+
+        geolocator = Nominatim(user_agent=self.user_agent)
+        location = geolocator.reverse((lat, lng), language="en")
+        address = location.raw.get('address', {}) if location else {}
+        self._count('misses')
+
+        GeocodedLocation.objects.bulk_create(
+            [GeocodedLocation(geohash=geohash, address=address)],
+            ignore_conflicts=True)
+        self._remember(geohash, address)
+        logger.debug("Geocoding cache miss for %s", geohash)
+        return dict(address)
+
+    def lookup_boundaries(self, lat, lng):
+        """
+        Resolve the address with a point-in-polygon query on the local boundaries.
+
+        * Returns the same keys as Nominatim (country, county, city).
+        """
+        point = Point(float(lng), float(lat), srid=4326)
+        address = {}
+        for level, name in AdminBoundary.objects.filter(
+                geometry__intersects=point).values_list('level', 'name'):
+            address.setdefault(level, name)
+        return address
+
+    def _remember(self, geohash, address):
+        with self._lock:
+            self._lru[geohash] = address
+            self._lru.move_to_end(geohash)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _count(self, counter):
+        key = GEOCODING_STATS_KEY + counter
+        try:
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, 0, None)
+                cache.incr(key)
+        except redis.RedisError:
+            logger.warning("Cache unavailable, could not count a geocoding %s", counter)
+
+    def stats(self):
+        """
+        Return the cache counters of all the processes and the hit ratio.
+        """
+        values = cache.get_many([GEOCODING_STATS_KEY + counter for counter in GEOCODING_COUNTERS])
+        stats = {counter: values.get(GEOCODING_STATS_KEY + counter, 0)
+                 for counter in GEOCODING_COUNTERS}
+        lookups = sum(stats.values())
+        hits = stats['memory_hits'] + stats['database_hits']
+        stats['hit_ratio'] = hits / lookups if lookups else 0.0
+        return stats
+
+    @property
+    def hit_ratio(self):
+        return self.stats()['hit_ratio']
+
+    def reset_stats(self):
+        """
+        Reset the shared cache counters.
+        """
+        cache.delete_many([GEOCODING_STATS_KEY + counter for counter in GEOCODING_COUNTERS])
+
+    def clear(self):
+        """
+        Empty the in-process LRU.
+        """
+        with self._lock:
+            self._lru.clear()
+
+
+# Shared geocoder used by the views and serializers.
+geocoder = ReverseGeocoder()
+
+
+def reverse_geocode(lat, lng):
+    """
+    Reverse geocode a coordinate using the shared cached geocoder.
+    """
+    return geocoder.reverse(lat, lng)
@@ -0,0 +1,127 @@
+# Django Imports
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.gis.geos import Point
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+# Local Imports
+from .models import Alert, Earthquake, Flood, Tornado, Fire, hazard_snapshot
+from .caching import bump_alert_data_version
+from .tasks import schedule_geocoding_batch
+
+HAZARD_MODEL_MAPPING = {
+    'earthquake': Earthquake,
+    'flood': Flood,
+    'tornado': Tornado,
+    'fire': Fire,
+}
+
+
+def build_hazard(hazard_type, hazard_data):
+    """
+    Build and validate an unsaved hazard instance.
+
+    * Empty strings are stored as missing values, like the single create.
+    * Raises ValidationError with the errors of the hazard fields.
+    """
+    model_class = HAZARD_MODEL_MAPPING.get((hazard_type or '').lower())
+    if model_class is None:
+        raise ValidationError({"hazard_type": "Invalid hazard type."})
+
+    hazard_data = {
+        key: (None if isinstance(value, str) and value.strip() == "" else value)
+        for key, value in (hazard_data or {}).items()
+    }
+    try:
+        hazard = model_class(**hazard_data)
+    except TypeError as e:
+        raise ValidationError({"hazard_data": str(e)})
+    try:
+        hazard.full_clean()
+    except ValidationError as e:
+        raise ValidationError({"hazard_data": e.message_dict})
+    return hazard
+
+
+def validate_location(lat, lng):
+    """
+    Check that a coordinate is within the WGS84 ranges.
+
+    * Raises ValidationError with the errors of the lat and lng fields.
+    """
+    errors = {}
+    for name, value, limit in (('lat', lat, 90), ('lng', lng, 180)):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            errors[name] = ["A valid number is required."]
+            continue
+        if not -limit <= value <= limit:
+            errors[name] = [f"Must be between -{limit} and {limit}."]
+    if errors:
+        raise ValidationError(errors)
+
+
+def bulk_create_alerts(items, user, geocode=True):
+    """
+    Create many alerts and their hazards with a few bulk INSERTs.
+
+    * `items` are validated CreateAlertSerializer data. Out of range
+      coordinates and invalid hazards are reported per item, so one bad
+      item never fails the whole batch.
+    * Hazards are inserted with one `bulk_create` per hazard type, then the
+      alerts with one `bulk_create`, all in a single transaction.
+    * save() and the post_save signals are skipped, so the defaults, the
+      hazard copy, the search vector and the cache version are handled here.
+    * Geocoding is queued in batches once the transaction commits, unless
+      `geocode` is False (the alerts are then picked up by the
+      `geocode_pending_alerts` task).
+    * Returns one (alert, errors) pair per item, alert is None on errors.
+    """
+    results = [None] * len(items)
+    pending = []
+    for index, item in enumerate(items):
+        try:
+            validate_location(item.get('lat'), item.get('lng'))
+            hazard = build_hazard(item.get('hazard_type'), item.get('hazard_data'))
+        except ValidationError as e:
+            results[index] = (None, e.message_dict)
+            continue
+        alert = Alert(
+            description=item.get('description', ''),
+            location=Point(float(item['lng']), float(item['lat']), srid=4326),
+            effect_radius=item.get('effect_radius'),
+            reported_by=user,
+            source_url=item.get('source_url'),
+            country='',
+            city='',
+            county='',
+            content_type=ContentType.objects.get_for_model(hazard),
+        )
+        pending.append((index, hazard, alert))
+
+    if not pending:
+        return results
+
+    with transaction.atomic():
+        hazards_by_model = {}
+        for _, hazard, _ in pending:
+            hazards_by_model.setdefault(type(hazard), []).append(hazard)
+        for model_class, hazards in hazards_by_model.items():
+            model_class.objects.bulk_create(hazards)
+
+        for _, hazard, alert in pending:
+            alert.object_id = hazard.pk
+            alert.hazard_type, alert.hazard_data = hazard_snapshot(hazard)
+            alert.set_defaults()
+        alerts = Alert.objects.bulk_create([alert for _, _, alert in pending])
+
+        alert_ids = [alert.pk for alert in alerts]
+        Alert.objects.filter(pk__in=alert_ids).update_search_vector()
+        bump_alert_data_version()
+        if geocode:
+            schedule_geocoding_batch(alert_ids)
+
+    for index, _, alert in pending:
+        results[index] = (alert, None)
+    return results
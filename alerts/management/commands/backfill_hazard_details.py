@@ -0,0 +1,50 @@
+# Django Imports
+from django.core.management.base import BaseCommand
+
+# Local Imports
+from alerts.models import Alert, hazard_snapshot
+
+
+class Command(BaseCommand):
+    """
+    Fill the hazard_type and hazard_data columns of the existing alerts.
+
+    * Reads the alerts in batches and loads their hazards in bulk.
+    * Only alerts without hazard_data are processed, unless --all is given.
+
+    Example:
+        python manage.py backfill_hazard_details --batch-size 2000
+    """
+    help = "Copy the hazard type and details of each alert into its hazard_type and hazard_data columns."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Number of alerts updated per query (default: 1000).")
+        parser.add_argument('--all', action='store_true',
+                            help="Refresh every alert, not only the ones never filled in.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        alerts = Alert.objects.filter(object_id__isnull=False)
+        if not options['all']:
+            alerts = alerts.filter(hazard_data__isnull=True)
+
+        updated = 0
+        last_id = 0
+        while True:
+            # Walk the primary key so updated rows do not shift the batches
+            batch = list(alerts.filter(id__gt=last_id).order_by('id').with_hazards().only(
+                'id', 'content_type', 'object_id')[:batch_size])
+            if not batch:
+                break
+
+            for alert in batch:
+                alert.hazard_type, alert.hazard_data = hazard_snapshot(alert.hazard_details)
+            Alert.objects.bulk_update(batch, ['hazard_type', 'hazard_data'])
+            Alert.objects.filter(id__in=[alert.id for alert in batch]).update_search_vector()
+
+            updated += len(batch)
+            last_id = batch[-1].id
+            self.stdout.write(f"Updated {updated} alerts...")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled the hazard details of {updated} alerts."))
@@ -0,0 +1,74 @@
+# Python Imports
+import gzip
+import sys
+import time
+
+# Django Imports
+from django.core.management.base import BaseCommand, CommandError
+
+# Local Imports
+from alerts.models import Alert
+from alerts.export import (EXPORT_FORMATS, filter_export_queryset, stream_ndjson, stream_csv,
+                           write_geoparquet)
+
+
+class Command(BaseCommand):
+    """
+    Export the alerts to a NDJSON (GeoJSON features), CSV or GeoParquet file.
+
+    * The alerts are read with a server-side cursor and written chunk by chunk.
+    * The hazard fields are flattened into their own columns.
+    * NDJSON and CSV are gzip compressed when the path ends with `.gz`.
+
+    Example:
+        python manage.py export_alerts alerts.csv.gz --format csv --hazard-type flood
+    """
+    help = "Export the alerts in bulk to a NDJSON, CSV or GeoParquet file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Output file ('-' for stdout).")
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson',
+                            help="Export format (default: ndjson).")
+        parser.add_argument('--hazard-type', help="Only export this hazard type.")
+        parser.add_argument('--country', help="Only export the alerts of this country.")
+        parser.add_argument('--active', choices=('true', 'false'),
+                            help="Only export active or archived alerts.")
+        parser.add_argument('--since', help="Only alerts created at or after this ISO 8601 date.")
+        parser.add_argument('--until', help="Only alerts created before this ISO 8601 date.")
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help="Number of alerts read per chunk (default: 2000).")
+
+    def handle(self, *args, **options):
+        try:
+            queryset = filter_export_queryset(Alert.objects.all(), options)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        path = options['path']
+        chunk_size = options['chunk_size']
+        started = time.monotonic()
+
+        if options['format'] == 'geoparquet':
+            if path == '-':
+                raise CommandError("GeoParquet can only be written to a file.")
+            try:
+                write_geoparquet(queryset, path, chunk_size)
+            except RuntimeError as e:
+                raise CommandError(str(e))
+        else:
+            stream = stream_ndjson if options['format'] == 'ndjson' else stream_csv
+            if path == '-':
+                output = sys.stdout
+            elif path.endswith('.gz'):
+                output = gzip.open(path, 'wt', encoding='utf-8', newline='')
+            else:
+                output = open(path, 'w', encoding='utf-8', newline='')
+            try:
+                for chunk in stream(queryset, chunk_size):
+                    output.write(chunk)
+            finally:
+                if output is not sys.stdout:
+                    output.close()
+
+        self.stderr.write(self.style.SUCCESS(
+            f"Exported the alerts to {path} in {time.monotonic() - started:.1f}s."))
@@ -0,0 +1,33 @@
+# Django Imports
+from django.core.management.base import BaseCommand
+
+# Local Imports
+from alerts.geocoding import geocoder
+
+
+class Command(BaseCommand):
+    """
+    Show the reverse geocoding cache counters of all the processes.
+
+    * Counts lookups served by the in-process LRU, by the `GeocodedLocation`
+      table and by Nominatim (misses), since the last reset.
+
+    Example:
+        python manage.py geocoding_stats --reset
+    """
+    help = "Show the reverse geocoding cache hit ratio."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help="Reset the counters after showing them.")
+
+    def handle(self, *args, **options):
+        stats = geocoder.stats()
+        self.stdout.write(
+            f"Memory hits: {stats['memory_hits']}\n"
+            f"Database hits: {stats['database_hits']}\n"
+            f"Misses: {stats['misses']}\n"
+            f"Hit ratio: {stats['hit_ratio']:.2%}")
+        if options['reset']:
+            geocoder.reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
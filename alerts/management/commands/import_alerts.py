@@ -0,0 +1,248 @@
+# Python Imports
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+# Library Imports
+import ijson
+
+# Django Imports
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+# Local Imports
+from alerts.models import Alert
+from alerts.ingest import bulk_create_alerts, HAZARD_MODEL_MAPPING
+from users.models import User
+
+FORMATS = ('geojson', 'csv', 'ndjson')
+FORMAT_EXTENSIONS = {
+    '.geojson': 'geojson', '.json': 'geojson',
+    '.csv': 'csv',
+    '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.geojsonl': 'ndjson', '.geojsons': 'ndjson',
+}
+
+# Source field names accepted for each alert field, in order of preference
+FIELD_ALIASES = {
+    'description': ('description', 'title', 'place'),
+    'source_url': ('source_url', 'url'),
+    'effect_radius': ('effect_radius', 'radius'),
+    'hazard_type': ('hazard_type', 'type'),
+    'lat': ('lat', 'latitude'),
+    'lng': ('lng', 'lon', 'longitude'),
+}
+# Source field names mapped onto hazard model fields (e.g. the USGS feed)
+HAZARD_FIELD_ALIASES = {
+    'mag': 'magnitude',
+}
+
+
+class Command(BaseCommand):
+    """
+    Import alerts from a large GeoJSON, CSV or NDJSON file.
+
+    * The file is streamed and loaded in `bulk_create` batches, each in its
+      own transaction.
+    * Records are mapped onto Alert and the hazard models: `lat`/`lng` (or a
+      GeoJSON point), `description`, `effect_radius`, `source_url`,
+      `hazard_type` and the hazard fields, either in `hazard_data` or as
+      their own columns. USGS feed names (`mag`, `place`, `url`) work too.
+    * Progress is reported with the offset to resume from (--offset) if the
+      import stops, and the import speed in rows/sec.
+    * Invalid records, including malformed NDJSON lines, are reported by
+      number and counted as failed.
+    * GeoJSON FeatureCollections are streamed with ijson, one feature at a time.
+
+    Example:
+        python manage.py import_alerts all_month.geojson --hazard-type earthquake --user usgs
+    """
+    help = "Import alerts in bulk from a GeoJSON, CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to the file to import.")
+        parser.add_argument('--format', choices=FORMATS,
+                            help="File format (default: guessed from the extension).")
+        parser.add_argument('--hazard-type',
+                            help="Hazard type of the records that do not have one.")
+        parser.add_argument('--user', help="Username set as the reporter of the alerts.")
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Number of records inserted per transaction (default: 1000).")
+        parser.add_argument('--offset', type=int, default=0,
+                            help="Number of records to skip, to resume an interrupted import.")
+        parser.add_argument('--geocode', action='store_true',
+                            help="Queue the geocoding of the imported alerts right away.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"File not found: {path}")
+        file_format = options['format'] or FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if file_format is None:
+            raise CommandError("Unknown file format, use --format.")
+
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"User '{options['user']}' not found.")
+
+        batch_size = options['batch_size']
+        offset = options['offset']
+        imported = 0
+        failed = 0
+        started = time.monotonic()
+
+        # ijson reads bytes, the csv module needs newline='' to handle quoted newlines
+        if file_format == 'geojson':
+            source = open(path, 'rb')
+        else:
+            source = open(path, newline='', encoding='utf-8')
+
+        with source:
+            records = islice(self.read_records(source, file_format), offset, None)
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+
+                numbers, items = [], []
+                for number, record in enumerate(batch, start=offset):
+                    try:
+                        if isinstance(record, ValueError):
+                            raise record
+                        items.append(self.map_record(record, options['hazard_type']))
+                        numbers.append(number)
+                    except ValueError as e:
+                        failed += 1
+                        self.stderr.write(f"Record {number}: {e}")
+
+                results = bulk_create_alerts(items, user, geocode=options['geocode'])
+                for number, (alert, errors) in zip(numbers, results):
+                    if alert is None:
+                        failed += 1
+                        self.stderr.write(f"Record {number}: {errors}")
+                    else:
+                        imported += 1
+
+                offset += len(batch)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"Imported {imported} alerts, {failed} failed, next offset {offset} "
+                    f"({imported / elapsed if elapsed else 0:.0f} rows/sec)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} alerts ({failed} failed) in {time.monotonic() - started:.1f}s."))
+
+    def read_records(self, source, file_format):
+        """
+        Yield the records of the file as flat dicts, one at a time.
+
+        * A NDJSON line that is not a JSON object is yielded as a ValueError,
+          so it keeps its record number and the import goes on.
+        """
+        if file_format == 'csv':
+            yield from csv.DictReader(source)
+        elif file_format == 'ndjson':
+            for line in source:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield ValueError(f"Invalid JSON: {e}")
+                    continue
+                if not isinstance(record, dict):
+                    yield ValueError("Not a JSON object.")
+                    continue
+                yield self.flatten(record)
+        else:
+            for feature in ijson.items(source, 'features.item', use_float=True):
+                yield self.flatten(feature)
+
+    def flatten(self, record):
+        """
+        Turn a GeoJSON feature into a flat dict of its properties and point
+        coordinates. Other records are returned as they are.
+        """
+        if record.get('type') != 'Feature':
+            return record
+        flat = dict(record.get('properties') or {})
+        geometry = record.get('geometry') or {}
+        if geometry.get('type') == 'Point':
+            coordinates = geometry['coordinates']
+            flat['lng'], flat['lat'] = coordinates[0], coordinates[1]
+            if len(coordinates) > 2 and 'depth' not in flat:
+                flat['depth'] = coordinates[2]
+        return flat
+
+    def map_record(self, record, default_hazard_type):
+        """
+        Map a flat record onto the fields accepted by `bulk_create_alerts`.
+
+        * The alert fields are validated like the model form would (e.g. the
+          length of `source_url`), so a bad value fails its record and not
+          the whole batch insert.
+        * Raises ValueError if the record cannot be mapped (e.g. no valid location).
+        """
+        item = {}
+        for field, aliases in FIELD_ALIASES.items():
+            value = next((record[alias] for alias in aliases
+                          if record.get(alias) not in (None, '')), None)
+            if value is not None:
+                item[field] = value
+
+        try:
+            lat, lng = float(item['lat']), float(item['lng'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Missing or invalid lat/lng.")
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValueError("lat/lng out of range.")
+        item['lat'], item['lng'] = lat, lng
+
+        if 'effect_radius' in item:
+            try:
+                item['effect_radius'] = int(float(item['effect_radius']))
+            except (TypeError, ValueError):
+                raise ValueError("Invalid effect_radius.")
+            if not 0 <= item['effect_radius'] <= 100000:
+                raise ValueError("effect_radius must be between 0 and 100000.")
+
+        alert_fields = {name: item[name] for name in ('description', 'source_url') if name in item}
+        alert = Alert(**alert_fields)
+        try:
+            alert.clean_fields(exclude=[field.name for field in Alert._meta.fields
+                                        if field.name not in alert_fields])
+        except ValidationError as e:
+            raise ValueError(e.message_dict)
+        item.update((name, getattr(alert, name)) for name in alert_fields)
+
+        item['hazard_type'] = item.get('hazard_type') or default_hazard_type
+        hazard_data = record.get('hazard_data') or {}
+        if isinstance(hazard_data, str):
+            try:
+                hazard_data = json.loads(hazard_data)
+            except ValueError:
+                raise ValueError("Invalid hazard_data JSON.")
+
+        # Pick up the hazard fields sent as their own columns or properties
+        model_class = HAZARD_MODEL_MAPPING.get((item['hazard_type'] or '').lower())
+        if model_class is not None:
+            hazard_fields = {field.name: field for field in model_class._meta.concrete_fields
+                             if not field.primary_key}
+            hazard_data = dict(hazard_data)
+            for key, value in record.items():
+                key = HAZARD_FIELD_ALIASES.get(key, key)
+                if key in hazard_fields and key not in hazard_data and value not in (None, ''):
+                    decimal_places = getattr(hazard_fields[key], 'decimal_places', None)
+                    if decimal_places is not None:
+                        # Feeds often have more precision than the model keeps
+                        try:
+                            value = round(float(value), decimal_places)
+                        except (TypeError, ValueError):
+                            raise ValueError(f"Invalid {key}.")
+                    hazard_data[key] = value
+
+        item['hazard_data'] = hazard_data
+        return item
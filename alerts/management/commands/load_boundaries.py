@@ -0,0 +1,84 @@
+# Django Imports
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.gis.gdal import DataSource, GDALException
+from django.contrib.gis.geos import MultiPolygon
+from django.db import transaction
+
+# Local Imports
+from alerts.models import AdminBoundary
+
+
+class Command(BaseCommand):
+    """
+    Load administrative boundary polygons for the offline reverse geocoder.
+
+    * Reads any OGR data source (e.g. a Natural Earth shapefile).
+    * Stores each feature as an AdminBoundary of the given level.
+
+    Example:
+        python manage.py load_boundaries ne_10m_admin_0_countries.shp --level country --name-field NAME
+    """
+    help = "Load boundary polygons (e.g. Natural Earth shapefiles) for offline reverse geocoding."
+
+    BATCH_SIZE = 500
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to the shapefile or other OGR data source.")
+        parser.add_argument('--level', required=True,
+                            choices=[choice for choice, _ in AdminBoundary.LEVEL_CHOICES],
+                            help="Address level filled from these polygons.")
+        parser.add_argument('--name-field', default='NAME',
+                            help="Attribute holding the area name (default: NAME).")
+        parser.add_argument('--layer', type=int, default=0,
+                            help="Index of the layer to load (default: 0).")
+        parser.add_argument('--replace', action='store_true',
+                            help="Delete the existing boundaries of this level first.")
+
+    def handle(self, *args, **options):
+        try:
+            layer = DataSource(options['path'])[options['layer']]
+        except (GDALException, IndexError) as e:
+            raise CommandError(f"Could not open the data source: {e}")
+
+        name_field = options['name_field']
+        if name_field not in layer.fields:
+            raise CommandError(
+                f"Field '{name_field}' not found. Available fields: {', '.join(layer.fields)}")
+
+        level = options['level']
+        loaded = 0
+        skipped = 0
+        batch = []
+
+        with transaction.atomic():
+            if options['replace']:
+                AdminBoundary.objects.filter(level=level).delete()
+
+            for feature in layer:
+                geometry = feature.geom
+                if geometry.geom_type.name not in ('Polygon', 'MultiPolygon'):
+                    skipped += 1
+                    continue
+                # Features without a spatial reference are assumed to be WGS84.
+                if geometry.srs is not None and geometry.srid != 4326:
+                    geometry.transform(4326)
+                geometry = geometry.geos
+                geometry.srid = 4326
+                if not isinstance(geometry, MultiPolygon):
+                    geometry = MultiPolygon(geometry, srid=4326)
+
+                batch.append(AdminBoundary(
+                    name=str(feature.get(name_field))[:100],
+                    level=level,
+                    geometry=geometry,
+                ))
+                if len(batch) >= self.BATCH_SIZE:
+                    AdminBoundary.objects.bulk_create(batch)
+                    loaded += len(batch)
+                    batch = []
+
+            AdminBoundary.objects.bulk_create(batch)
+            loaded += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {loaded} {level} boundaries ({skipped} non-polygon features skipped)."))
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:48
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0012_geocodedlocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminBoundary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Name of the area.', max_length=100)),
+                ('level', models.CharField(choices=[('country', 'Country'), ('county', 'County'), ('city', 'City')], db_index=True, help_text='Administrative level the area is used for.', max_length=20)),
+                ('geometry', django.contrib.gis.db.models.fields.MultiPolygonField(help_text='Boundary of the area.', srid=4326)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0013_adminboundary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alert',
+            name='geocoded_at',
+            field=models.DateTimeField(blank=True, help_text='Time the location details were filled in by the geocoder.', null=True),
+        ),
+    ]
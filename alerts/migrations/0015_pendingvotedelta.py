@@ -0,0 +1,24 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0014_alert_geocoded_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingVoteDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('positive', models.IntegerField(default=0, help_text='Change of the positive votes.')),
+                ('negative', models.IntegerField(default=0, help_text='Change of the negative votes.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('alert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_vote_deltas', to='alerts.alert')),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0016_alert_active_created_idx'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alert',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='alert_search_vector_idx'),
+        ),
+        # Backfill the search vector of the existing alerts (same weights as alert_search_vector()).
+        migrations.RunSQL(
+            sql="""
+                UPDATE alerts_alert SET search_vector =
+                    setweight(to_tsvector('english'::regconfig, COALESCE(
+                        (SELECT model FROM django_content_type
+                         WHERE django_content_type.id = alerts_alert.content_type_id), '')), 'A') ||
+                    setweight(to_tsvector('english'::regconfig,
+                        COALESCE(country, '') || ' ' || COALESCE(city, '') || ' ' || COALESCE(county, '')), 'B') ||
+                    setweight(to_tsvector('english'::regconfig, COALESCE(description, '')), 'C');
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
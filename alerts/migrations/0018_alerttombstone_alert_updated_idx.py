@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0017_alert_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alert_id', models.BigIntegerField(help_text='Id of the deleted alert.')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['updated_at', 'id'], name='alert_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0018_alerttombstone_alert_updated_idx'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alert',
+            name='hazard_type',
+            field=models.CharField(blank=True, help_text='Model name of the hazard (earthquake, flood...).', max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='alert',
+            name='hazard_data',
+            field=models.JSONField(blank=True, help_text='Fields of the hazard details.', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['content_type', 'object_id'], name='alert_hazard_idx'),
+        ),
+    ]
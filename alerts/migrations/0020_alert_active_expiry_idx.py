@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-18 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0019_alert_hazard_type_hazard_data'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['soft_deletion_time'], name='alert_active_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.11 on 2026-10-18 16:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0020_alert_active_expiry_idx'),
+    ]
+
+    operations = [
+        # Planar lng/lat lookups of the active alerts (map clusters and tiles),
+        # the expression must match `location::geometry` in the queries.
+        migrations.RunSQL(
+            sql="CREATE INDEX alert_location_geom_idx ON alerts_alert "
+                "USING GIST ((location::geometry)) WHERE is_active;",
+            reverse_sql="DROP INDEX IF EXISTS alert_location_geom_idx;",
+        ),
+    ]
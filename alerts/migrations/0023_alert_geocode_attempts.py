@@ -0,0 +1,40 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:10
+
+from django.db import migrations, models
+from django.db.models import F, Q
+
+
+def backfill_geocoded_at(apps, schema_editor):
+    """
+    Mark the alerts that already have location details as geocoded, so the
+    pending sweep does not geocode the whole back catalogue again.
+    """
+    Alert = apps.get_model('alerts', 'Alert')
+    Alert.objects.filter(
+        Q(country__gt='') | Q(city__gt='') | Q(county__gt=''), geocoded_at__isnull=True
+    ).update(geocoded_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0022_alert_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alert',
+            name='geocode_queued_at',
+            field=models.DateTimeField(blank=True, help_text='Last time the pending geocoding sweep queued this alert.', null=True),
+        ),
+        migrations.AddField(
+            model_name='alert',
+            name='geocode_attempts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Number of times the pending geocoding sweep queued this alert.'),
+        ),
+        migrations.RunPython(backfill_geocoded_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(condition=models.Q(('geocoded_at__isnull', True)), fields=['created_at'], name='alert_geocode_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0023_alert_geocode_attempts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alerttombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ),
+    ]
@@ -1,9 +1,17 @@
 # Python Imports
+import re
+from decimal import Decimal
 
 # Django Imports
 from django.contrib.gis.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, SearchVectorField)
+from django.db.models import F, Q, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.forms.models import model_to_dict
 from django.utils.timezone import now
 from django.core.validators import MaxValueValidator
 from datetime import timedelta
@@ -12,6 +20,108 @@ from datetime import timedelta
 from users.models import User
 
 
+def hazard_snapshot(hazard):
+    """
+    Return the (hazard_type, hazard_data) denormalized on an alert.
+
+    * hazard_data is the `model_to_dict` of the hazard, with decimals stored
+      as numbers like the API has always returned them.
+    * Returns (None, None) when there is no hazard.
+    """
+    if hazard is None:
+        return None, None
+    data = {}
+    for key, value in model_to_dict(hazard).items():
+        # A hazard that was just created still holds the raw input values
+        value = hazard._meta.get_field(key).to_python(value)
+        data[key] = float(value) if isinstance(value, Decimal) else value
+    return hazard._meta.model_name, data
+
+
+def alert_search_vector():
+    """
+    Expression computing the full-text search vector of an alert.
+
+    * Hazard type (weight A), place names (weight B) and description (weight C).
+    """
+    return (
+        SearchVector('hazard_type', weight='A', config='english') +
+        SearchVector('country', 'city', 'county', weight='B', config='english') +
+        SearchVector('description', weight='C', config='english')
+    )
+
+
+class AlertQuerySet(models.QuerySet):
+    """
+    Custom QuerySet for the Alert model.
+
+    * Holds the spatial filters used by the API endpoints.
+    * `with_hazards()` loads the hazard details with one query per hazard type.
+    """
+
+    def search(self, text):
+        """
+        Full-text search on the description, places and hazard type.
+
+        * Every word must match, the last characters of a word may be missing
+          (prefix matching), e.g. "earthq" finds earthquake alerts.
+        * Results are ordered by relevance, then by creation date.
+        """
+        terms = re.findall(r'\w+', text)
+        if not terms:
+            return self.none()
+        query = SearchQuery(' & '.join(f"{term}:*" for term in terms),
+                            search_type='raw', config='english')
+        return self.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-created_at')
+
+    def update_search_vector(self):
+        """
+        Recompute the search vector of the alerts with a single UPDATE.
+        """
+        return self.update(search_vector=alert_search_vector())
+
+    def with_hazards(self):
+        """
+        Prefetch the content type and the hazard details of the alerts.
+        """
+        return self.select_related('content_type').prefetch_related('hazard_details')
+
+    def near(self, point, radius=0):
+        """
+        Alerts whose effect radius circle intersects the circle of `radius`
+        meters around `point`.
+
+        * Uses ST_DWithin on the geography `location` field (GiST index).
+        """
+        return self.filter(location__dwithin=(point, F('effect_radius') + radius))
+
+    def intersecting(self, geometry):
+        """
+        Alerts whose effect radius circle intersects the given geometry
+        (e.g. a bounding box polygon).
+        """
+        return self.filter(location__dwithin=(geometry, F('effect_radius')))
+
+    def with_pending_votes(self):
+        """
+        Annotate the vote deltas not yet folded into the vote counters.
+
+        * Used when vote buffering is enabled (see `alerts.votes`).
+        * The merged counts are available as `live_positive_votes`
+          and `live_negative_votes`.
+        """
+        pending = PendingVoteDelta.objects.filter(
+            alert=OuterRef('pk')).values('alert')
+        return self.annotate(
+            pending_positive_votes=Coalesce(Subquery(
+                pending.annotate(total=Sum('positive')).values('total')), Value(0)),
+            pending_negative_votes=Coalesce(Subquery(
+                pending.annotate(total=Sum('negative')).values('total')), Value(0)),
+        )
+
+
 class Alert(models.Model):
     """
     Alert model to store information about alerts.
@@ -39,6 +149,12 @@ class Alert(models.Model):
     country = models.CharField(max_length=100, blank=True, null=True)
     city = models.CharField(max_length=100, blank=True, null=True)
     county = models.CharField(max_length=100, blank=True, null=True)
+    geocoded_at = models.DateTimeField(null=True, blank=True,
+        help_text="Time the location details were filled in by the geocoder.")
+    geocode_queued_at = models.DateTimeField(null=True, blank=True,
+        help_text="Last time the pending geocoding sweep queued this alert.")
+    geocode_attempts = models.PositiveSmallIntegerField(default=0,
+        help_text="Number of times the pending geocoding sweep queued this alert.")
 
     reported_by = models.ForeignKey(User, on_delete=models.SET_NULL,
                                     null=True, blank=True, help_text="User who created the alert.")
@@ -60,12 +176,46 @@ class Alert(models.Model):
     object_id = models.PositiveIntegerField(null=True, blank=True)
     hazard_details = GenericForeignKey('content_type', 'object_id')
 
-    def save(self, *args, **kwargs):
+    # Copy of the hazard type and details, kept in sync on save and by the
+    # hazard post_save signal, so reads do not follow the generic relation.
+    hazard_type = models.CharField(max_length=50, blank=True, null=True,
+        help_text="Model name of the hazard (earthquake, flood...).")
+    hazard_data = models.JSONField(null=True, blank=True,
+        help_text="Fields of the hazard details.")
+
+    # Full-text search document, maintained on save (see AlertQuerySet.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = AlertQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the active alerts on (created_at, id)
+            models.Index(fields=['-created_at', '-id'], condition=Q(is_active=True),
+                         name='alert_active_created_idx'),
+            # Keyset pagination of all the alerts (list_alerts API cursor mode)
+            models.Index(fields=['-created_at', '-id'], name='alert_created_idx'),
+            GinIndex(fields=['search_vector'], name='alert_search_vector_idx'),
+            # Delta sync reads the alerts changed after a cursor in this order
+            models.Index(fields=['updated_at', 'id'], name='alert_updated_idx'),
+            # Alerts of a hazard, to refresh their hazard_data copy
+            models.Index(fields=['content_type', 'object_id'], name='alert_hazard_idx'),
+            # Expiry sweep of the active alerts past their soft deletion time
+            models.Index(fields=['soft_deletion_time'], condition=Q(is_active=True),
+                         name='alert_active_expiry_idx'),
+            # Sweep of the alerts still waiting for their location details
+            models.Index(fields=['created_at'], condition=Q(geocoded_at__isnull=True),
+                         name='alert_geocode_pending_idx'),
+        ]
+
+    # Fields included in the full-text search vector
+    SEARCH_FIELDS = {'description', 'country', 'city', 'county', 'hazard_type'}
+
+    def set_defaults(self):
         """
-        Override the save method to set default values for the alert.
-        
-        * If the effect radius is not set, it will be set based on the hazard type.
-        * If the deletion time is not set, it will be calculated based on the hazard type.
+        Set the default effect radius and deletion time of the alert.
+
+        * Called by save(), and by the bulk ingestion which skips save().
         """
         hazard_name = self.content_type.model if self.content_type else None
 
@@ -100,8 +250,30 @@ class Alert(models.Model):
             if not self.soft_deletion_time or self._state.adding:
                 self.soft_deletion_time = now() + timedelta(days=1)
 
+    def save(self, *args, **kwargs):
+        """
+        Override the save method to set default values for the alert.
+        
+        * If the effect radius is not set, it will be set based on the hazard type.
+        * If the deletion time is not set, it will be calculated based on the hazard type.
+        * The hazard_type and hazard_data copies are refreshed when the hazard
+          instance was set or loaded, or when they were never filled in.
+        """
+        hazard_field = self._meta.get_field('hazard_details')
+        if hazard_field.is_cached(self) or (self.object_id and self.hazard_data is None):
+            self.hazard_type, self.hazard_data = hazard_snapshot(self.hazard_details)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'hazard_type', 'hazard_data'}
+
+        self.set_defaults()
         super().save(*args, **kwargs)
 
+        # Keep the full-text search vector in sync with the searchable fields
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or self.SEARCH_FIELDS.intersection(update_fields):
+            Alert.objects.filter(pk=self.pk).update_search_vector()
+
 
     def delete(self, *args, **kwargs):
         """
@@ -116,6 +288,20 @@ class Alert(models.Model):
                 pass
         return super().delete(*args, **kwargs)
     
+    @property
+    def live_positive_votes(self):
+        """
+        Positive votes including the buffered deltas, if they were annotated.
+        """
+        return self.positive_votes + getattr(self, 'pending_positive_votes', 0)
+
+    @property
+    def live_negative_votes(self):
+        """
+        Negative votes including the buffered deltas, if they were annotated.
+        """
+        return self.negative_votes + getattr(self, 'pending_negative_votes', 0)
+
     def __str__(self):
         hazard_str = self.content_type.model if self.content_type else "Unknown"
         return f"{hazard_str} - {self.description[:50]}"
@@ -214,6 +400,45 @@ class Fire(models.Model):
     def __str__(self):
         return f"Fire (Intensity: {self.fire_intensity}, Contained: {self.is_contained})"
 
+class GeocodedLocation(models.Model):
+    """
+    Persistent reverse geocoding cache.
+
+    * Each row stores the address returned by the geocoder for a geohash cell,
+      so repeated reports from the same area skip the network call.
+    """
+    geohash = models.CharField(max_length=12, unique=True,
+        help_text="Geohash cell the address was resolved for.")
+    address = models.JSONField(default=dict, blank=True,
+        help_text="Address details returned by the geocoder.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.geohash} - {self.address.get('country', 'Unknown')}"
+
+
+class AdminBoundary(models.Model):
+    """
+    Administrative boundary polygon used for offline reverse geocoding.
+
+    * Loaded from a shapefile (e.g. Natural Earth) with `manage.py load_boundaries`.
+    * The geometry field has a spatial (GiST) index for point-in-polygon lookups.
+    """
+    LEVEL_CHOICES = [
+        ('country', 'Country'),
+        ('county', 'County'),
+        ('city', 'City'),
+    ]
+
+    name = models.CharField(max_length=100, help_text="Name of the area.")
+    level = models.CharField(max_length=20, choices=LEVEL_CHOICES, db_index=True,
+        help_text="Administrative level the area is used for.")
+    geometry = models.MultiPolygonField(srid=4326, help_text="Boundary of the area.")
+
+    def __str__(self):
+        return f"{self.name} ({self.level})"
+
+
 class AlertUserVote(models.Model):
     """
     Model to store user votes on alerts.
@@ -228,4 +453,45 @@ class AlertUserVote(models.Model):
         unique_together = ('user', 'alert')
 
     def __str__(self):
-        return f"{self.user.username} - {self.alert.id} - {self.vote}"
\ No newline at end of file
+        return f"{self.user.username} - {self.alert.id} - {self.vote}"
+
+
+class PendingVoteDelta(models.Model):
+    """
+    Vote counter change waiting to be folded into the counters.
+
+    * Written instead of updating the Alert row when vote buffering is enabled,
+      so concurrent votes on a hot alert do not wait on the same row lock.
+    * Folded into Alert and User counters by the `flush_vote_deltas` task.
+    """
+    alert = models.ForeignKey(Alert, on_delete=models.CASCADE,
+                              related_name='pending_vote_deltas')
+    positive = models.IntegerField(default=0,
+        help_text="Change of the positive votes.")
+    negative = models.IntegerField(default=0,
+        help_text="Change of the negative votes.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.alert_id}: +{self.positive} / -{self.negative}"
+
+
+class AlertTombstone(models.Model):
+    """
+    Record of a hard-deleted alert.
+
+    * Written by a post_delete signal, so delta sync clients (`?since=`)
+      learn about alerts that no longer exist.
+    """
+    alert_id = models.BigIntegerField(help_text="Id of the deleted alert.")
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Delta sync and the alert data state read the tombstones older
+            # than the commit lag bound
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Alert {self.alert_id} deleted at {self.deleted_at}"
@@ -0,0 +1,127 @@
+# Python Imports
+import base64
+import json
+
+# Django Imports
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.response import Response
+
+
+def encode_cursor(alert):
+    """
+    Build an opaque cursor pointing after the given alert.
+    """
+    position = [alert.created_at.isoformat(), alert.pk]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor into its (created_at, id) position.
+
+    * Raises ValueError if the cursor is invalid.
+    """
+    try:
+        created_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        created_at = parse_datetime(created_at)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("Invalid cursor.")
+    if created_at is None or not isinstance(pk, int):
+        raise ValueError("Invalid cursor.")
+    return created_at, pk
+
+
+class KeysetPage:
+    """
+    A page of alerts fetched with keyset pagination.
+
+    * Iterable like a Paginator page.
+    * There is no page count, only a cursor to the next page.
+    """
+
+    def __init__(self, object_list, next_cursor, cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return bool(self.cursor)
+
+
+def keyset_page(queryset, cursor=None, page_size=4):
+    """
+    Return the KeysetPage of alerts following the cursor.
+
+    * Alerts are ordered by (created_at, id) descending, backed by the
+      `alert_active_created_idx` index (active alerts) or `alert_created_idx`
+      (all alerts), so the cost of a page does not depend
+      on how deep it is and no COUNT(*) is needed.
+    * Raises ValueError if the cursor is invalid.
+    """
+    queryset = queryset.order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(created_at__lte=created_at).exclude(
+            created_at=created_at, id__gte=pk)
+
+    alerts = list(queryset[:page_size + 1])
+    next_cursor = encode_cursor(alerts[page_size - 1]) if len(alerts) > page_size else None
+    return KeysetPage(alerts[:page_size], next_cursor, cursor)
+
+
+class AlertCursorPagination(BasePagination):
+    """
+    Optional keyset pagination for the alert API endpoints.
+
+    * Only enabled when the `cursor` query parameter is sent (empty for the
+      first page), otherwise the full list is returned as before.
+    * `page_size` can be set up to 500 (default 100).
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 100
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            return None
+
+        try:
+            page_size = min(int(request.query_params.get(
+                self.page_size_query_param, self.page_size)), self.max_page_size)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: "Must be a number."})
+        if page_size < 1:
+            raise ValidationError({self.page_size_query_param: "Must be at least 1."})
+
+        try:
+            self.page = keyset_page(
+                queryset, request.query_params[self.cursor_query_param], page_size)
+        except ValueError as e:
+            raise ValidationError({self.cursor_query_param: str(e)})
+        self.request = request
+        return self.page.object_list
+
+    def get_next_link(self):
+        if not self.page.has_next():
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.page.next_cursor)
+
+    def get_paginated_response(self, data):
+        # data is a GeoJSON FeatureCollection, the cursor is added next to the features.
+        data['next_cursor'] = self.page.next_cursor
+        data['next'] = self.get_next_link()
+        return Response(data)
@@ -1,6 +1,9 @@
+# Python imports
+from itertools import islice
+
 # Django imports
 from rest_framework import serializers
-from django.forms.models import model_to_dict
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework_gis.serializers import GeoFeatureModelSerializer
 
 # Local imports
@@ -37,11 +40,32 @@ class AlertGeoSerializer(GeoFeatureModelSerializer):
         )
 
     def get_hazard_type(self, obj):
-        if obj.content_type:
-            return obj.content_type.model
-        return None
+        return obj.hazard_type
     
     def get_hazard_details(self, obj):
-        if obj.hazard_details:
-            return model_to_dict(obj.hazard_details)
-        return None
\ No newline at end of file
+        return obj.hazard_data
+
+
+def stream_feature_collection(queryset, serializer_class=AlertGeoSerializer, chunk_size=500):
+    """
+    Yield a GeoJSON FeatureCollection piece by piece.
+
+    * The queryset is read with a server-side cursor, `chunk_size` rows at a time.
+    * Each chunk is serialized and written before the next one is read, so
+      memory use does not grow with the number of alerts.
+    """
+    encoder = JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+    yield '{"type":"FeatureCollection","features":['
+
+    first = True
+    alerts = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(alerts, chunk_size))
+        if not chunk:
+            break
+
+        for feature in serializer_class(chunk, many=True).data['features']:
+            yield ('' if first else ',') + encoder.encode(feature)
+            first = False
+
+    yield ']}'
@@ -0,0 +1,55 @@
+# Django Imports
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+# Local Imports
+from .models import (Alert, AlertTombstone, AlertUserVote, Earthquake, Flood, Tornado, Fire,
+                     hazard_snapshot)
+from .caching import bump_alert_data_version
+
+HAZARD_MODELS = (Earthquake, Flood, Tornado, Fire)
+# Models whose changes show up in the alert list responses
+ALERT_DATA_MODELS = (Alert, AlertUserVote) + HAZARD_MODELS
+
+
+@receiver(post_delete, sender=Alert)
+def record_alert_tombstone(sender, instance, **kwargs):
+    """
+    Keep a tombstone of deleted alerts for the delta sync clients.
+    """
+    AlertTombstone.objects.create(alert_id=instance.pk)
+
+
+def invalidate_alert_responses(sender, **kwargs):
+    """
+    Invalidate the cached alert list responses when alert data changes.
+    """
+    bump_alert_data_version()
+
+
+for model in ALERT_DATA_MODELS:
+    post_save.connect(invalidate_alert_responses, sender=model,
+                      dispatch_uid=f"invalidate_alert_responses_save_{model.__name__}")
+    post_delete.connect(invalidate_alert_responses, sender=model,
+                        dispatch_uid=f"invalidate_alert_responses_delete_{model.__name__}")
+
+
+def refresh_alert_hazard_data(sender, instance, created, **kwargs):
+    """
+    Refresh the hazard_data copy of the alerts of an edited hazard.
+
+    * A new hazard has no alert yet, the alert copies it when it is saved.
+    """
+    if created:
+        return
+    hazard_type, hazard_data = hazard_snapshot(instance)
+    Alert.objects.filter(
+        content_type=ContentType.objects.get_for_model(sender), object_id=instance.pk
+    ).update(hazard_type=hazard_type, hazard_data=hazard_data, updated_at=now())
+
+
+for model in HAZARD_MODELS:
+    post_save.connect(refresh_alert_hazard_data, sender=model,
+                      dispatch_uid=f"refresh_alert_hazard_data_{model.__name__}")
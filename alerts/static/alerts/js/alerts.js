@@ -385,6 +385,8 @@ document.getElementById("alertForm").addEventListener("submit", function (e) {
 // Pagination and Search functionality for alerts list
 document.addEventListener("DOMContentLoaded", function() {
   // Initialize currentPage and totalPages based on rendered data
+  // In cursor mode the page has plain links instead of the page controls
+  if (!document.getElementById('current-page')) return;
   let currentPage = parseInt(document.querySelector('#current-page').innerText.match(/\d+/)[0]);
   let totalPages = parseInt(document.getElementById('current-page').getAttribute('data-total-pages'));
 
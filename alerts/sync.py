@@ -0,0 +1,129 @@
+# Python Imports
+import base64
+import json
+from datetime import timedelta
+
+# Django Imports
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+
+# Local Imports
+from .models import Alert, AlertTombstone
+
+
+def encode_sync_cursor(updated_at, alert_id, tombstone_id):
+    """
+    Build an opaque delta sync cursor.
+
+    * Points after the last alert change (updated_at, id) and the last
+      tombstone the client has seen.
+    """
+    position = [updated_at.isoformat() if updated_at else None, alert_id, tombstone_id]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_sync_cursor(cursor):
+    """
+    Decode a delta sync cursor into its (updated_at, alert_id, tombstone_id) position.
+
+    * Raises ValueError if the cursor is invalid.
+    """
+    try:
+        updated_at, alert_id, tombstone_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        updated_at = parse_datetime(updated_at) if updated_at is not None else None
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("Invalid since cursor.")
+    if not isinstance(alert_id, int) or not isinstance(tombstone_id, int):
+        raise ValueError("Invalid since cursor.")
+    return updated_at, alert_id, tombstone_id
+
+
+class AlertChanges:
+    """
+    Alerts changed since a delta sync cursor.
+
+    * `alerts`: created, updated and archived alerts (archived ones have
+      `is_active` set to False).
+    * `deleted_ids`: ids of the alerts deleted since the cursor.
+    * `next_cursor`: cursor to send on the next poll.
+    * `has_more`: True if the changes did not fit in one response, the next
+      cursor should be used right away.
+    """
+
+    def __init__(self, alerts, deleted_ids, next_cursor, has_more):
+        self.alerts = alerts
+        self.deleted_ids = deleted_ids
+        self.next_cursor = next_cursor
+        self.has_more = has_more
+
+
+def alert_changes(queryset, cursor=None, limit=500):
+    """
+    Return the AlertChanges of the queryset since the cursor.
+
+    * Without a cursor (first sync), only the active alerts are returned.
+    * With a cursor, every alert whose `updated_at` moved past the cursor is
+      returned, archived ones included, along with the tombstones of the
+      deleted alerts. Alerts are read in (updated_at, id) order, backed by
+      the `alert_updated_idx` index.
+    * `updated_at` is stamped when a row is written, not when it commits, so
+      the cursor never moves past the last ALERT_SYNC_COMMIT_LAG seconds.
+      Changes from that window are sent again on the next poll, along with
+      any transaction that committed late with an earlier timestamp.
+    * Raises ValueError if the cursor is invalid.
+    """
+    bound = now() - timedelta(seconds=settings.ALERT_SYNC_COMMIT_LAG)
+    if cursor:
+        updated_at, alert_id, tombstone_id = decode_sync_cursor(cursor)
+        if updated_at is not None:
+            queryset = queryset.filter(
+                Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=alert_id))
+        tombstones = list(AlertTombstone.objects.filter(
+            id__gt=tombstone_id).order_by('id').values_list(
+            'id', 'alert_id', 'deleted_at')[:limit + 1])
+    else:
+        # Read the positions first, so changes made while the first sync
+        # runs are picked up by the next poll.
+        tombstone_id = AlertTombstone.objects.filter(deleted_at__lt=bound).order_by(
+            '-id').values_list('id', flat=True).first() or 0
+        latest = Alert.objects.order_by('-updated_at', '-id').values_list(
+            'updated_at', 'id').first()
+        updated_at, alert_id = latest or (None, 0)
+        queryset = queryset.filter(is_active=True)
+        tombstones = []
+
+    alerts = list(queryset.order_by('updated_at', 'id')[:limit + 1])
+    alerts_more = len(alerts) > limit
+    tombstones_more = len(tombstones) > limit
+    alerts, tombstones = alerts[:limit], tombstones[:limit]
+
+    if alerts and (cursor or alerts_more):
+        updated_at, alert_id = alerts[-1].updated_at, alerts[-1].pk
+    if updated_at is not None and updated_at > bound:
+        # The rest of the alerts are also past the bound, they are read on the next poll
+        updated_at, alert_id = bound, 0
+        alerts_more = False
+    for position, _, deleted_at in tombstones:
+        if deleted_at >= bound:
+            tombstones_more = False
+            break
+        tombstone_id = position
+
+    return AlertChanges(
+        alerts,
+        [deleted_alert_id for _, deleted_alert_id, _ in tombstones],
+        encode_sync_cursor(updated_at, alert_id, tombstone_id),
+        alerts_more or tombstones_more,
+    )
+
+
+def changes_response_data(data, changes):
+    """
+    Add the delta sync fields next to the serialized changed alerts.
+    """
+    data['deleted'] = changes.deleted_ids
+    data['next_cursor'] = changes.next_cursor
+    data['has_more'] = changes.has_more
+    return data
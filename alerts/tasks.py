@@ -1,20 +1,202 @@
+# Python Imports
+import logging
+import time
+from datetime import timedelta
+
 # Library Imports
 from celery import shared_task
+from django.db import transaction
+from django.db.models import F, Q
 from django.utils.timezone import now
 
 # Local Imports
 from .models import Alert
+from .geocoding import reverse_geocode
+from .caching import bump_alert_data_version
+from .votes import flush_vote_deltas as fold_vote_deltas
+
+logger = logging.getLogger(__name__)
+
+# The pending sweep queues an alert at most this many times, and not again
+# while a previous task may still be retrying
+GEOCODE_MAX_ATTEMPTS = 3
+GEOCODE_RETRY_AFTER = timedelta(hours=1)
 
 
 @shared_task
-def deactivate_expired_alerts():
+def deactivate_expired_alerts(batch_size=1000, max_batches=50):
     """
     Deactivate alerts that have expired.
 
-    * This task is run periodically to deactivate alerts that have expired.
+    * This task is run every minute, so alerts are archived close to their
+      soft deletion time.
+    * Alerts are deactivated in batches of `batch_size` in id order, each in
+      its own short transaction, backed by the `alert_active_expiry_idx`
+      partial index.
+    * Rows locked by a user or another sweep are skipped and picked up by
+      the next run.
+    """
+    started = time.monotonic()
+    cutoff = now()
+    deactivated = 0
+    last_id = 0
+    for _ in range(max_batches):
+        batch_count, last_id = deactivate_expired_batch(cutoff, last_id, batch_size)
+        deactivated += batch_count
+        if last_id is None:
+            break
+
+    if deactivated:
+        bump_alert_data_version()
+    elapsed = time.monotonic() - started
+    logger.info("Deactivated %s expired alerts in %.3fs", deactivated, elapsed)
+    return f"Deactivated {deactivated} alerts in {elapsed:.3f}s."
+
+
+def deactivate_expired_batch(cutoff, last_id, batch_size):
+    """
+    Deactivate the next batch of alerts expired at `cutoff` with an id above `last_id`.
+
+    * Returns the number of deactivated alerts and the last id looked at,
+      or None as the last id when there are no more expired alerts.
+    """
+    with transaction.atomic():
+        expired_ids = list(Alert.objects.select_for_update(skip_locked=True).filter(
+            is_active=True, soft_deletion_time__lte=cutoff, id__gt=last_id
+        ).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not expired_ids:
+            return 0, None
+        # Bump updated_at so delta sync clients see the alerts being archived
+        deactivated = Alert.objects.filter(id__in=expired_ids).update(
+            is_active=False, updated_at=now())
+    return deactivated, expired_ids[-1] if len(expired_ids) == batch_size else None
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True,
+             retry_backoff_max=600, max_retries=5)
+def geocode_alert(self, alert_id):
+    """
+    Fill in the country, city and county of an alert.
+
+    * Alerts are created without location details and enriched by this task,
+      so alert creation never waits on the geocoder.
+    * Failures are retried with exponential backoff.
+    * Fields already filled in (e.g. edited by a user) are kept.
+    """
+    alert = Alert.objects.filter(pk=alert_id).first()
+    if alert is None:
+        return f"Alert {alert_id} no longer exists."
+
+    fill_alert_address(alert)
+    return f"Geocoded alert {alert_id}."
+
+
+@shared_task
+def geocode_alerts(alert_ids):
+    """
+    Fill in the location details of a batch of alerts (e.g. bulk ingestion).
+
+    * Nearby alerts share the geocoder cache, so a batch usually costs
+      far fewer upstream lookups than alerts.
+    * An alert that fails is handed to `geocode_alert` and its retries.
+    """
+    geocoded = 0
+    for alert in Alert.objects.filter(pk__in=alert_ids, geocoded_at__isnull=True):
+        try:
+            fill_alert_address(alert)
+            geocoded += 1
+        except Exception:
+            logger.exception("Could not geocode alert %s, retrying alone", alert.pk)
+            geocode_alert.delay(alert.pk)
+    return f"Geocoded {geocoded} of {len(alert_ids)} alerts."
+
+
+def fill_alert_address(alert):
+    """
+    Reverse geocode an alert and save its country, city and county.
+
+    * Fields already filled in (e.g. edited by a user) are kept.
     """
-    print("Deactivating expired alerts...")
-    expired_alerts = Alert.objects.filter(
-        is_active=True, soft_deletion_time__lte=now())
-    updated_count = expired_alerts.update(is_active=False)
-    return f"Deactivated {updated_count} alerts."
+    address = reverse_geocode(alert.location.y, alert.location.x)
+    alert.country = alert.country or address.get('country', '')
+    alert.city = alert.city or address.get('city', address.get('town', ''))
+    alert.county = alert.county or address.get('county', '')
+    alert.geocoded_at = now()
+    alert.save(update_fields=['country', 'city', 'county', 'geocoded_at', 'updated_at'])
+
+
+@shared_task
+def geocode_pending_alerts():
+    """
+    Queue the geocoding of alerts that were never geocoded.
+
+    * Picks up alerts whose task could not be queued or ran out of retries.
+    * Alerts queued less than GEOCODE_RETRY_AFTER ago are skipped, their
+      task may still be retrying.
+    * An alert is given up on after GEOCODE_MAX_ATTEMPTS sweeps.
+    """
+    current_time = now()
+    pending = Alert.objects.filter(
+        Q(geocode_queued_at__isnull=True) | Q(geocode_queued_at__lte=current_time - GEOCODE_RETRY_AFTER),
+        geocoded_at__isnull=True, geocode_attempts__lt=GEOCODE_MAX_ATTEMPTS,
+        created_at__lte=current_time - timedelta(minutes=10),
+    )
+    pending_ids = list(pending.order_by('created_at').values_list('id', flat=True)[:100])
+    Alert.objects.filter(id__in=pending_ids).update(
+        geocode_queued_at=current_time, geocode_attempts=F('geocode_attempts') + 1)
+    for alert_id in pending_ids:
+        geocode_alert.delay(alert_id)
+    return f"Queued geocoding for {len(pending_ids)} alerts."
+
+
+@shared_task
+def flush_vote_deltas():
+    """
+    Fold the buffered vote deltas into the vote counters.
+
+    * Only has work to do when VOTE_BUFFERING is enabled.
+    * Runs batches until the buffer is empty (or 20 batches were folded).
+    """
+    folded = 0
+    for _ in range(20):
+        batch_count = fold_vote_deltas()
+        folded += batch_count
+        if not batch_count:
+            break
+    return f"Folded {folded} vote deltas."
+
+
+def schedule_geocoding(alert_id):
+    """
+    Queue the geocoding of an alert once the current transaction commits.
+
+    * A broker failure is logged instead of failing the request, the alert
+      is picked up later by `geocode_pending_alerts`.
+    """
+    def enqueue():
+        try:
+            geocode_alert.delay(alert_id)
+        except Exception:
+            logger.exception("Could not queue geocoding for alert %s", alert_id)
+
+    transaction.on_commit(enqueue)
+
+
+def schedule_geocoding_batch(alert_ids, batch_size=100):
+    """
+    Queue the geocoding of many alerts once the current transaction commits.
+
+    * Alerts are sent in batches of `batch_size` to the `geocode_alerts` task.
+    * Like `schedule_geocoding`, a broker failure is only logged.
+    """
+    alert_ids = list(alert_ids)
+
+    def enqueue():
+        for start in range(0, len(alert_ids), batch_size):
+            try:
+                geocode_alerts.delay(alert_ids[start:start + batch_size])
+            except Exception:
+                logger.exception("Could not queue geocoding for %s alerts",
+                                 len(alert_ids[start:start + batch_size]))
+
+    transaction.on_commit(enqueue)
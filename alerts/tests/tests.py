@@ -1,7 +1,15 @@
+import gzip
+import json
+import math
+import os
+import redis
+import tempfile
 import string
+from io import StringIO
+from urllib.parse import quote
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.gis.geos import Point
 from rest_framework import status
@@ -14,13 +22,26 @@ from django.http import HttpResponseForbidden
 from unittest.mock import patch, MagicMock
 from django.contrib.contenttypes.models import ContentType
 from rest_framework.test import APITestCase
-from django.contrib.gis.geos import Point
-from django.db.models import Q
-
-from alerts.tests.factories import (UserFactory, AlertFactory)
+from django.contrib.gis.geos import Point, Polygon, MultiPolygon
+from django.db.models import F, Q
+from django.db import connection
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test.utils import CaptureQueriesContext
+
+from alerts.tests.factories import (UserFactory, AlertFactory, EarthquakeFactory,
+                                    FloodFactory, TornadoFactory, FireFactory)
 from users.models import User
 from alerts.models import (Alert, Earthquake, Flood,
-                           Tornado, Fire, AlertUserVote)
+                           Tornado, Fire, AlertUserVote, GeocodedLocation,
+                           AdminBoundary, PendingVoteDelta)
+from alerts.geocoding import ReverseGeocoder, geocoder, geohash_encode
+from alerts.caching import bump_alert_data_version
+from alerts.views import AlertGeoJsonListView
+from alerts.forms import AlertForm
+from alerts.tasks import (geocode_alert, schedule_geocoding, flush_vote_deltas,
+                          deactivate_expired_alerts, geocode_pending_alerts,
+                          GEOCODE_MAX_ATTEMPTS)
 
 
 
@@ -214,9 +235,16 @@ class AlertGeoJsonListViewTest(APITestCase):
       - The response is in GeoJSON format (FeatureCollection).
       - Only active alerts are returned.
       - Each feature contains hazard type and hazard details.
+      - The response is streamed and stays valid across several chunks.
+      - The `since` cursor returns only the changed alerts.
+      - Conditional requests get a 304 while nothing changed, and a 200
+        after a change committed late with an older updated_at.
+      - Rendered responses are cached until an alert changes, and served
+        uncached while the cache is down.
     """
 
     def setUp(self):
+        cache.clear()
         # Create a few active alerts.
         self.active_alerts = []
         for i in range(3):
@@ -235,15 +263,24 @@ class AlertGeoJsonListViewTest(APITestCase):
         # Get the URL for the GeoJSON view.
         self.url = reverse('alerts-geojson') 
 
+    def get_geojson(self):
+        """
+        Consume the streamed response and parse it.
+        """
+        response = self.client.get(self.url)
+        if response.streaming:
+            return response, json.loads(b''.join(response.streaming_content))
+        # Served from the response cache
+        return response, json.loads(response.content)
+
     def test_alert_geojson_list_status_and_format(self):
         """
         Ensure that the AlertGeoJsonListView returns a 200 status code and valid GeoJSON.
         """
-        response = self.client.get(self.url)
+        response, data = self.get_geojson()
         self.assertEqual(response.status_code, 200)
         # Check that the response is JSON.
         self.assertEqual(response['Content-Type'], 'application/json')
-        data = response.json()
         # Verify that the top-level GeoJSON type is 'FeatureCollection'.
         self.assertEqual(data.get('type'), 'FeatureCollection')
         # Check that the number of features equals the number of active alerts.
@@ -254,8 +291,7 @@ class AlertGeoJsonListViewTest(APITestCase):
         """
         Verify that each GeoJSON feature includes hazard type and hazard details.
         """
-        response = self.client.get(self.url)
-        data = response.json()
+        _, data = self.get_geojson()
         features = data.get('features', [])
         for feature in features:
             properties = feature.get('properties', {})
@@ -264,6 +300,251 @@ class AlertGeoJsonListViewTest(APITestCase):
             # Check that hazard_details is provided.
             self.assertIn('hazard_details', properties)
 
+    def test_query_count_does_not_grow_with_alerts(self):
+        """
+        The number of queries should not depend on the number of alerts.
+        """
+        # Make sure every hazard type is present before measuring.
+        for factory in (EarthquakeFactory, FloodFactory, TornadoFactory, FireFactory):
+            AlertFactory.create(hazard_instance=factory(), is_active=True)
+        self.get_geojson()
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as small_page:
+            self.get_geojson()
+        for factory in (EarthquakeFactory, FloodFactory, TornadoFactory, FireFactory):
+            AlertFactory.create_batch(3, hazard_instance=factory(), is_active=True)
+        cache.clear()
+        with CaptureQueriesContext(connection) as large_page:
+            _, data = self.get_geojson()
+
+        self.assertEqual(len(small_page), len(large_page))
+        for feature in data['features']:
+            self.assertIsNotNone(feature['properties']['hazard_details'])
+
+    @override_settings(ALERT_SYNC_COMMIT_LAG=0)
+    def test_delta_sync(self):
+        """
+        With `since`, the map only receives the alerts changed since its last poll.
+        """
+        response = self.client.get(self.url, {'since': ''})
+        self.assertEqual(len(response.data['features']), len(self.active_alerts))
+        alert = self.active_alerts[0]
+        alert.is_active = False
+        alert.save()
+
+        response = self.client.get(self.url, {'since': response.data['next_cursor']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([feature['id'] for feature in response.data['features']], [alert.id])
+        self.assertFalse(response.data['features'][0]['properties']['is_active'])
+
+    def test_conditional_get(self):
+        """
+        A poll with the previous ETag gets a 304 until an alert changes.
+        """
+        etag = self.client.get(self.url)['ETag']
+        self.assertTrue(etag)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.active_alerts[0].description = "Changed"
+        self.active_alerts[0].save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_conditional_get_late_commit(self):
+        """
+        A change committed with an older updated_at still changes the ETag.
+        """
+        etag = self.client.get(self.url)['ETag']
+        alert = self.active_alerts[0]
+        # A writer that started before the last change and commits after it
+        Alert.objects.filter(pk=alert.pk).update(
+            description="Late", updated_at=alert.updated_at - timedelta(minutes=1))
+        bump_alert_data_version()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_get_cache_unavailable(self):
+        """
+        Without the cache the ETag still works, from the alert data state alone.
+        """
+        with patch("alerts.caching.cache.get_or_set", side_effect=redis.ConnectionError):
+            etag = self.client.get(self.url)['ETag']
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_response_cached_until_alerts_change(self):
+        """
+        The rendered body is served from the cache until an alert changes.
+        """
+        self.get_geojson()
+        with CaptureQueriesContext(connection) as cached:
+            response, data = self.get_geojson()
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(data['features']), len(self.active_alerts))
+        self.assertFalse(any('alerts_alert"."description' in query['sql']
+                             for query in cached.captured_queries))
+
+        AlertFactory.create(description="New Alert", is_active=True)
+        response, data = self.get_geojson()
+        self.assertTrue(response.streaming)
+        self.assertEqual(len(data['features']), len(self.active_alerts) + 1)
+
+    @patch("alerts.caching.cache")
+    def test_cache_unavailable(self, mock_cache):
+        """
+        While the cache is down, alerts can still be saved and the list is
+        served uncached.
+        """
+        for method in ('get', 'set', 'incr', 'get_or_set'):
+            getattr(mock_cache, method).side_effect = redis.ConnectionError
+        AlertFactory.create(description="New Alert", is_active=True)
+
+        response, data = self.get_geojson()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(len(data['features']), len(self.active_alerts) + 1)
+
+    def test_features_streamed_in_chunks(self):
+        """
+        Every active alert is written once when the queryset spans several chunks.
+        """
+        cache.clear()
+        with patch.object(AlertGeoJsonListView, 'chunk_size', 2):
+            _, data = self.get_geojson()
+        self.assertEqual(data['type'], 'FeatureCollection')
+        self.assertCountEqual(
+            [feature['id'] for feature in data['features']],
+            [alert.id for alert in self.active_alerts])
+
+
+class AlertClusterViewTest(APITestCase):
+    """
+    Test case for the AlertClusterView.
+
+    This class verifies that:
+      - Nearby alerts are grouped in one cluster at low zoom.
+      - Each cluster has its count and dominant hazard type.
+      - Alerts are returned one by one at high zoom.
+      - Alerts outside the bbox and inactive alerts are ignored.
+      - Invalid parameters return a 400 error.
+    """
+
+    def setUp(self):
+        self.url = reverse('alerts-clusters')
+        self.alerts_in_view = [
+            AlertFactory.create(hazard_instance=FloodFactory(),
+                                location=Point(10 + i * 0.001, 10), is_active=True)
+            for i in range(3)
+        ]
+        self.alerts_in_view.append(AlertFactory.create(
+            hazard_instance=FireFactory(), location=Point(10.002, 10.001), is_active=True))
+        AlertFactory.create(hazard_instance=FireFactory(),
+                            location=Point(10, 10), is_active=False)
+        # Outside of the requested bbox
+        AlertFactory.create(hazard_instance=FireFactory(),
+                            location=Point(50, 50), is_active=True)
+        self.bbox = "9,9,11,11"
+
+    def test_alerts_clustered_at_low_zoom(self):
+        response = self.client.get(self.url, {'zoom': 5, 'bbox': self.bbox})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['clustered'])
+        features = response.data['features']
+        self.assertEqual(len(features), 1)
+        self.assertEqual(features[0]['properties']['count'], 4)
+        self.assertEqual(features[0]['properties']['hazard_type'], 'flood')
+        self.assertNotIn('alert_id', features[0]['properties'])
+
+    def test_alerts_returned_individually_at_high_zoom(self):
+        response = self.client.get(self.url, {'zoom': 18, 'bbox': self.bbox})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['clustered'])
+        features = response.data['features']
+        self.assertEqual(len(features), 4)
+        self.assertCountEqual([f['properties']['alert_id'] for f in features],
+                              [alert.id for alert in self.alerts_in_view])
+
+    def test_whole_world_bbox(self):
+        """
+        A bbox spanning all longitudes (low zooms) still returns every active alert.
+        """
+        AlertFactory.create(hazard_instance=FireFactory(),
+                            location=Point(-170, -60), is_active=True)
+        response = self.client.get(self.url, {'zoom': 0, 'bbox': '-200,-90,200,90'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sum(f['properties']['count'] for f in response.data['features']), 6)
+
+    def test_invalid_parameters(self):
+        for params in ({'bbox': self.bbox}, {'zoom': 'a', 'bbox': self.bbox},
+                       {'zoom': 30, 'bbox': self.bbox}, {'zoom': 5},
+                       {'zoom': 5, 'bbox': '11,11,9,9'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AlertTileViewTest(APITestCase):
+    """
+    Test case for the AlertTileView.
+
+    This class verifies that:
+      - A tile containing an active alert is a non-empty vector tile.
+      - A tile without alerts is empty.
+      - Tiles can be cached.
+      - Invalid tile coordinates return a 400 error.
+    """
+
+    def setUp(self):
+        cache.clear()
+        AlertFactory.create(location=Point(10, 10), effect_radius=1000, is_active=True)
+
+    def tile_url(self, lng, lat, zoom):
+        """
+        URL of the tile containing a coordinate.
+        """
+        n = 2 ** zoom
+        x = int((lng + 180) / 360 * n)
+        lat_rad = math.radians(lat)
+        y = int((1 - math.asinh(math.tan(lat_rad)) / math.pi) / 2 * n)
+        return reverse('alerts-tiles', kwargs={'z': zoom, 'x': x, 'y': y})
+
+    def test_tile_with_alert(self):
+        """
+        The tile containing the alert is a cacheable, non-empty vector tile.
+        """
+        response = self.client.get(self.tile_url(10, 10, 8))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/vnd.mapbox-vector-tile')
+        self.assertGreater(len(response.content), 0)
+        self.assertIn('max-age', response['Cache-Control'])
+
+    def test_empty_tile(self):
+        """
+        A tile far from any alert is empty.
+        """
+        response = self.client.get(self.tile_url(-100, -40, 8))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, b'')
+
+    def test_world_tile(self):
+        """
+        The zoom 0 tile, spanning all longitudes, holds the alert.
+        """
+        response = self.client.get(reverse('alerts-tiles', kwargs={'z': 0, 'x': 0, 'y': 0}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(len(response.content), 0)
+
+    def test_invalid_tile(self):
+        """
+        Tile coordinates outside of the zoom level return a 400 error.
+        """
+        response = self.client.get(reverse('alerts-tiles', kwargs={'z': 2, 'x': 4, 'y': 0}))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class CreateAlertViewTest(APITestCase):
     """
@@ -299,6 +580,8 @@ class CreateAlertViewTest(APITestCase):
         fake_token = MagicMock()
         fake_token.user = self.user
         self.client.force_authenticate(user=self.user, token=fake_token)
+        # Start each test with an empty in-process geocoding cache.
+        geocoder.clear()
 
     def test_missing_lat_lng(self):
         """
@@ -325,7 +608,7 @@ class CreateAlertViewTest(APITestCase):
         """
         data = self.valid_data.copy()
         data["hazard_type"] = "invalid_hazard"
-        with patch("alerts.views.Nominatim") as mock_nominatim:
+        with patch("alerts.geocoding.Nominatim") as mock_nominatim:
             # Patch reverse geocoding to return a valid location.
             fake_location = MagicMock()
             fake_location.raw = {"address": {"country": "USA", "city": "New York", "county": "New York County"}}
@@ -336,36 +619,25 @@ class CreateAlertViewTest(APITestCase):
 
     def test_reverse_geocoding_failure(self):
             """
-            Simulate a failure in reverse geocoding and ensure it returns a 400 error with an appropriate message.
+            A failure in reverse geocoding does not fail the alert creation,
+            geocoding is no longer part of the request.
             """
             data = self.valid_data.copy()
-            with patch("alerts.views.Nominatim") as mock_nominatim:
+            with patch("alerts.geocoding.Nominatim") as mock_nominatim:
                 # Simulate an exception during reverse geocoding.
                 instance = mock_nominatim.return_value
                 instance.reverse.side_effect = Exception("Geocoding error")
                 response = self.client.post(self.url, data, format='json')
-                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.status_code, 201)
+                instance.reverse.assert_not_called()
 
-    @patch("alerts.views.Nominatim")
-    def test_successful_alert_creation(self, mock_nominatim):
+    @patch("alerts.views.schedule_geocoding")
+    def test_successful_alert_creation(self, mock_schedule_geocoding):
         """
         Ensure that a valid POST request creates an alert successfully and returns the expected JSON response.
         """
         data = self.valid_data.copy()
 
-        # Patch reverse geocoding to return a fake location with address details.
-        fake_location = MagicMock()
-        fake_location.raw = {
-            "address": {
-                "country": "USA",
-                "city": "New York",
-                "town": "New York",
-                "county": "New York County"
-            }
-        }
-        instance = mock_nominatim.return_value
-        instance.reverse.return_value = fake_location
-
         response = self.client.post(self.url, data, format='json')
         response_data = response.data
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -377,9 +649,11 @@ class CreateAlertViewTest(APITestCase):
         self.assertEqual(response_data.get("hazard_details"), data["hazard_data"])
         self.assertEqual(response_data.get("reported_by"), str(self.user))
         self.assertEqual(response_data.get("source_url"), data["source_url"])
-        self.assertEqual(response_data.get("country"), "USA")
-        self.assertEqual(response_data.get("city"), "New York")
-        self.assertEqual(response_data.get("county"), "New York County")
+        # Location details are filled in later by the geocode_alert task.
+        self.assertEqual(response_data.get("country"), "")
+        self.assertEqual(response_data.get("city"), "")
+        self.assertEqual(response_data.get("county"), "")
+        mock_schedule_geocoding.assert_called_once_with(response_data["id"])
 
         # Verify that the alert is created in the database.
         self.assertTrue(Alert.objects.filter(id=response_data["id"]).exists())
@@ -389,6 +663,205 @@ class CreateAlertViewTest(APITestCase):
         self.assertEqual(self.user.alerts_created, 1)
 
 
+class DeactivateExpiredAlertsTaskTest(TestCase):
+    """
+    Test case for the deactivate_expired_alerts task.
+
+    This class verifies that:
+      - Only the active alerts past their soft deletion time are deactivated.
+      - Alerts are handled in several batches and their updated_at is bumped.
+    """
+
+    def test_deactivate_expired_alerts_in_batches(self):
+        alerts = [Alert.objects.create(description=f"Alert {i}", location=Point(0, 0))
+                  for i in range(5)]
+        expired_ids = [alert.id for alert in alerts[:3]]
+        Alert.objects.filter(id__in=expired_ids).update(
+            soft_deletion_time=now() - timedelta(minutes=1),
+            updated_at=now() - timedelta(days=1))
+
+        result = deactivate_expired_alerts(batch_size=2)
+
+        self.assertTrue(result.startswith("Deactivated 3 alerts"))
+        self.assertEqual(
+            set(Alert.objects.filter(is_active=False).values_list('id', flat=True)), set(expired_ids))
+        self.assertFalse(Alert.objects.filter(
+            id__in=expired_ids, updated_at__lt=now() - timedelta(hours=1)).exists())
+
+
+class GeocodeAlertTaskTest(TestCase):
+    """
+    Test case for the geocode_alert task.
+
+    This class verifies that:
+      - The alert's location details are filled in and geocoded_at is stamped.
+      - Fields already filled in are kept.
+      - The task is queued once the creating transaction commits.
+      - The pending sweep skips alerts queued recently or too many times.
+    """
+
+    def setUp(self):
+        geocoder.clear()
+        self.alert = Alert.objects.create(
+            description="Alert to geocode",
+            location=Point(-74.0060, 40.7128),
+            effect_radius=5000,
+            country="",
+            city="Edited City",
+            county="",
+        )
+        self.address = {"country": "USA", "city": "New York", "county": "New York County"}
+
+    @patch("alerts.tasks.reverse_geocode")
+    def test_geocode_alert(self, mock_reverse_geocode):
+        """
+        The task fills the empty place fields and stamps geocoded_at.
+        """
+        mock_reverse_geocode.return_value = self.address
+        geocode_alert(self.alert.id)
+
+        mock_reverse_geocode.assert_called_once_with(40.7128, -74.0060)
+        self.alert.refresh_from_db()
+        self.assertEqual(self.alert.country, "USA")
+        self.assertEqual(self.alert.city, "Edited City")
+        self.assertEqual(self.alert.county, "New York County")
+        self.assertIsNotNone(self.alert.geocoded_at)
+
+    @patch("alerts.tasks.geocode_alert.delay")
+    def test_schedule_geocoding_on_commit(self, mock_delay):
+        """
+        The task is only queued when the transaction commits.
+        """
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            schedule_geocoding(self.alert.id)
+            mock_delay.assert_not_called()
+        self.assertEqual(len(callbacks), 1)
+        mock_delay.assert_called_once_with(self.alert.id)
+
+    @patch("alerts.tasks.geocode_alert.delay")
+    def test_geocode_pending_alerts(self, mock_delay):
+        """
+        The sweep queues an alert once per retry window and gives up after
+        GEOCODE_MAX_ATTEMPTS sweeps.
+        """
+        Alert.objects.filter(pk=self.alert.pk).update(created_at=now() - timedelta(hours=1))
+
+        geocode_pending_alerts()
+        mock_delay.assert_called_once_with(self.alert.id)
+        self.alert.refresh_from_db()
+        self.assertEqual(self.alert.geocode_attempts, 1)
+
+        # Still retrying: not queued again
+        geocode_pending_alerts()
+        self.assertEqual(mock_delay.call_count, 1)
+
+        # Out of attempts: given up on
+        Alert.objects.filter(pk=self.alert.pk).update(
+            geocode_queued_at=now() - timedelta(days=1), geocode_attempts=GEOCODE_MAX_ATTEMPTS)
+        geocode_pending_alerts()
+        self.assertEqual(mock_delay.call_count, 1)
+
+
+class ReverseGeocoderTest(TestCase):
+    """
+    Test case for the cached ReverseGeocoder.
+
+    This class verifies that:
+      - Coordinates in the same geohash cell share a single network lookup.
+      - The persistent cache is used when the in-process LRU is empty.
+      - The hit ratio is shared through the cache and shown by the
+        geocoding_stats command.
+      - Failures are not cached.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.geocoder = ReverseGeocoder(precision=6, lru_size=2)
+        self.fake_location = MagicMock()
+        self.fake_location.raw = {"address": {"country": "USA", "city": "New York"}}
+
+    def test_geohash_encode(self):
+        """
+        A known coordinate encodes to its reference geohash.
+        """
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+    @patch("alerts.geocoding.Nominatim")
+    def test_nearby_coordinates_hit_the_cache(self, mock_nominatim):
+        """
+        Two reports a few meters apart only call the geocoder once.
+        """
+        mock_nominatim.return_value.reverse.return_value = self.fake_location
+        first = self.geocoder.reverse(40.7128, -74.0060)
+        second = self.geocoder.reverse(40.7129, -74.0061)
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_nominatim.return_value.reverse.call_count, 1)
+        self.assertEqual(self.geocoder.hit_ratio, 0.5)
+        self.assertTrue(GeocodedLocation.objects.filter(
+            geohash=geohash_encode(40.7128, -74.0060, 6)).exists())
+
+    @patch("alerts.geocoding.Nominatim")
+    def test_persistent_cache_survives_lru_clear(self, mock_nominatim):
+        """
+        Clearing the in-process LRU falls back to the database, not the network.
+        """
+        mock_nominatim.return_value.reverse.return_value = self.fake_location
+        self.geocoder.reverse(40.7128, -74.0060)
+        self.geocoder.clear()
+        address = self.geocoder.reverse(40.7128, -74.0060)
+
+        self.assertEqual(address["country"], "USA")
+        self.assertEqual(mock_nominatim.return_value.reverse.call_count, 1)
+        self.assertEqual(self.geocoder.stats()["database_hits"], 1)
+
+    @patch("alerts.geocoding.Nominatim")
+    def test_stats_command(self, mock_nominatim):
+        """
+        Counters from any geocoder instance are shown by the command, then reset.
+        """
+        mock_nominatim.return_value.reverse.return_value = self.fake_location
+        self.geocoder.reverse(40.7128, -74.0060)
+        # Another process: its own LRU, the same counters
+        ReverseGeocoder(precision=6).reverse(40.7128, -74.0060)
+
+        stdout = StringIO()
+        call_command('geocoding_stats', '--reset', stdout=stdout)
+        self.assertIn("Database hits: 1", stdout.getvalue())
+        self.assertIn("Hit ratio: 50.00%", stdout.getvalue())
+        self.assertEqual(self.geocoder.stats()["misses"], 0)
+
+    @patch("alerts.geocoding.Nominatim")
+    def test_failures_are_not_cached(self, mock_nominatim):
+        """
+        An upstream error is raised and the next call retries the network.
+        """
+        mock_nominatim.return_value.reverse.side_effect = Exception("Rate limited")
+        with self.assertRaises(Exception):
+            self.geocoder.reverse(40.7128, -74.0060)
+        self.assertFalse(GeocodedLocation.objects.exists())
+
+    @patch("alerts.geocoding.Nominatim")
+    def test_boundaries_backend(self, mock_nominatim):
+        """
+        The boundaries backend resolves the address locally without Nominatim.
+        """
+        def square(min_coord, max_coord):
+            return MultiPolygon(Polygon.from_bbox(
+                (min_coord, min_coord, max_coord, max_coord)), srid=4326)
+
+        AdminBoundary.objects.create(name="Testland", level="country", geometry=square(-10, 10))
+        AdminBoundary.objects.create(name="Test County", level="county", geometry=square(-1, 1))
+        AdminBoundary.objects.create(name="Elsewhere", level="country", geometry=square(20, 30))
+
+        local_geocoder = ReverseGeocoder(backend='boundaries')
+        self.assertEqual(local_geocoder.reverse(0.5, 0.5),
+                         {"country": "Testland", "county": "Test County"})
+        self.assertEqual(local_geocoder.reverse(5, 5), {"country": "Testland"})
+        self.assertEqual(local_geocoder.reverse(50, 50), {})
+        mock_nominatim.assert_not_called()
+
+
 class AlertsPaginatedViewTest(APITestCase):
     """
     Test case for the AlertsPaginatedView.
@@ -397,6 +870,8 @@ class AlertsPaginatedViewTest(APITestCase):
       - The view returns the correct paginated alerts.
       - The alerts are sorted by created_at in descending order.
       - The view handles search queries correctly.
+      - The search matches word prefixes and place names.
+      - The search vector is updated when an alert is saved.
       - The view filters out inactive alerts.
     """
     
@@ -500,6 +975,110 @@ class AlertsPaginatedViewTest(APITestCase):
         descriptions = [alert["description"] for alert in data["alerts"]]
         self.assertIn("Unique search term alert", descriptions)
 
+    def test_search_alerts_by_prefix_and_place(self):
+        """
+        Test that partial words match and that place names are searched.
+        """
+        Alert.objects.create(
+            description="Flooding near the river",
+            location=Point(10, 10),
+            effect_radius=2000,
+            country="Norway",
+            city="Bergen",
+            county="Vestland",
+            is_active=True
+        )
+        response = self.client.get(self.url, {'q': 'flood berg'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        descriptions = [alert["description"] for alert in response.data["alerts"]]
+        self.assertEqual(descriptions, ["Flooding near the river"])
+
+    def test_search_vector_updated_on_save(self):
+        """
+        Test that editing a searchable field updates the search results.
+        """
+        alert = Alert.objects.get(description="Test alert 0")
+        alert.description = "Wildfire spreading"
+        alert.save()
+        self.assertEqual(list(Alert.objects.search("wildfire")), [alert])
+        self.assertFalse(Alert.objects.search("Test alert 0").filter(pk=alert.pk).exists())
+
+
+class AlertsKeysetPaginationTest(APITestCase):
+    """
+    Test case for the cursor (keyset) mode of the alert list views.
+
+    This class verifies that:
+      - Following the cursors returns every active alert exactly once, in order.
+      - The last page has no next cursor.
+      - An invalid cursor is rejected, by the API and the home page.
+      - The home page renders the page after a cursor with a link to the next one.
+    """
+
+    def setUp(self):
+        self.url = reverse('paginated_alert')
+        # Alerts created in the same instant are ordered by id.
+        for i in range(10):
+            AlertFactory.create(description=f"Keyset alert {i}", is_active=True)
+        AlertFactory.create(description="Inactive alert", is_active=False)
+
+    def test_walk_all_pages(self):
+        """
+        Walking the cursors returns 4, 4 and 2 alerts without duplicates.
+        """
+        seen = []
+        page_sizes = []
+        cursor = ''
+        while cursor is not None:
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            page_sizes.append(len(response.data["alerts"]))
+            seen.extend(alert["id"] for alert in response.data["alerts"])
+            self.assertEqual(response.data["has_next"], response.data["next_cursor"] is not None)
+            cursor = response.data["next_cursor"]
+
+        expected = list(Alert.objects.filter(is_active=True).order_by(
+            '-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(page_sizes, [4, 4, 2])
+        self.assertEqual(seen, expected)
+
+    def test_cursor_ignored_while_searching(self):
+        """
+        A search with a cursor is still paged by number and ordered by relevance.
+        """
+        # The newest alert comes first by date, but the city match ranks higher
+        by_city = AlertFactory.create(description="Wind damage", city="Stormville", is_active=True)
+        by_description = AlertFactory.create(description="Storm coming", city="Calm",
+                                             is_active=True)
+        response = self.client.get(self.url, {'q': 'stormville', 'cursor': ''})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["page"], 1)
+        response = self.client.get(self.url, {'q': 'storm', 'cursor': ''})
+        self.assertEqual([alert["id"] for alert in response.data["alerts"]],
+                         [by_city.id, by_description.id])
+
+    def test_invalid_cursor(self):
+        """
+        An invalid cursor returns a 400 error.
+        """
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('home'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_home_view_cursor_mode(self):
+        """
+        The home page renders the alerts following the cursor.
+        """
+        first_page = self.client.get(self.url, {'cursor': ''}).data
+        response = self.client.get(reverse('home'), {'cursor': first_page["next_cursor"]})
+        self.assertEqual(response.status_code, 200)
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj.object_list), 4)
+        first_ids = {alert["id"] for alert in first_page["alerts"]}
+        self.assertFalse(first_ids & {alert.id for alert in page_obj})
+        self.assertContains(response, f'href="?cursor={quote(page_obj.next_cursor)}"')
+
 
 class AlertDetailsAndEditViewTest(TestCase):
     """
@@ -509,6 +1088,7 @@ class AlertDetailsAndEditViewTest(TestCase):
       - The view returns the correct context for both owners and non-owners.
       - The view handles GET and POST requests correctly.
       - The view processes hazard details appropriately.
+      - Saving an edit keeps the votes counted since the form was loaded.
     """
     
     def setUp(self):
@@ -702,6 +1282,205 @@ class AlertDetailsAndEditViewTest(TestCase):
         # Verify that the alert remains unchanged.
         self.alert.refresh_from_db()
 
+    def test_edit_keeps_concurrent_votes(self):
+        """
+        Saving the edit form does not overwrite votes counted after it was loaded.
+        """
+        form = AlertForm(data={
+            "description": "Edited while voted on",
+            "effect_radius": 6000,
+            "soft_deletion_time": (timezone.now() + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M'),
+            "source_url": "http://example.com/edited",
+        }, instance=Alert.objects.get(pk=self.alert.pk))
+        Alert.objects.filter(pk=self.alert.pk).update(negative_votes=F('negative_votes') + 2)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+
+        self.alert.refresh_from_db()
+        self.assertEqual(self.alert.description, "Edited while voted on")
+        self.assertEqual(self.alert.negative_votes, 2)
+
+
+class AlertHazardDataTest(TestCase):
+    """
+    Test case for the hazard_type and hazard_data copies on Alert.
+
+    This class verifies that:
+      - The copies are filled in when an alert is created with a hazard.
+      - Editing the hazard refreshes the copies.
+      - The backfill command fills in the alerts without a copy.
+      - with_hazards() loads the hazards with one query per hazard type.
+    """
+
+    def test_hazard_copied_on_create(self):
+        alert = AlertFactory.create(hazard_instance=EarthquakeFactory(magnitude=6.5))
+        alert.refresh_from_db()
+        self.assertEqual(alert.hazard_type, 'earthquake')
+        self.assertEqual(alert.hazard_data['magnitude'], 6.5)
+
+    def test_hazard_edit_refreshes_alert(self):
+        flood = FloodFactory(severity='low')
+        alert = AlertFactory.create(hazard_instance=flood)
+        flood.severity = 'major'
+        flood.save()
+        alert.refresh_from_db()
+        self.assertEqual(alert.hazard_data['severity'], 'major')
+
+    def test_backfill_command(self):
+        alert = AlertFactory.create(hazard_instance=FireFactory(cause="Lightning"))
+        Alert.objects.filter(pk=alert.pk).update(hazard_type=None, hazard_data=None)
+
+        call_command('backfill_hazard_details', stdout=StringIO())
+        alert.refresh_from_db()
+        self.assertEqual(alert.hazard_type, 'fire')
+        self.assertEqual(alert.hazard_data['cause'], "Lightning")
+
+    def test_with_hazards_queries(self):
+        """
+        The alerts query and one query per hazard type, whatever the number of alerts.
+        """
+        for magnitude in (5.5, 6.5):
+            AlertFactory.create(hazard_instance=EarthquakeFactory(magnitude=magnitude))
+        AlertFactory.create(hazard_instance=FloodFactory(severity='low'))
+
+        with self.assertNumQueries(3):
+            hazards = [alert.hazard_details for alert in Alert.objects.with_hazards()]
+        self.assertEqual(sorted(type(hazard).__name__ for hazard in hazards),
+                         ['Earthquake', 'Earthquake', 'Flood'])
+
+
+def write_temp_file(test, suffix, content):
+    """
+    Write content to a temporary file removed after the test.
+    """
+    handle, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(handle, 'w') as f:
+        f.write(content)
+    test.addCleanup(os.remove, path)
+    return path
+
+
+class ImportAlertsCommandTest(TestCase):
+    """
+    Test case for the import_alerts management command.
+
+    This class verifies that:
+      - GeoJSON features (USGS feed style) are mapped onto alerts and hazards.
+      - CSV rows with hazard columns are imported.
+      - Invalid records are skipped and reported.
+      - Malformed NDJSON lines are reported by number without stopping the import.
+      - Field values the database would reject fail their record only.
+      - An import can be resumed from an offset.
+    """
+
+    def test_import_geojson_feed(self):
+        """
+        USGS style features are mapped onto alerts and earthquake hazards.
+        """
+        feed = {"type": "FeatureCollection", "features": [
+            {"type": "Feature",
+             "properties": {"mag": 4.567, "place": f"{i} km N of Testville",
+                            "url": "https://earthquake.usgs.gov/", "type": "earthquake"},
+             "geometry": {"type": "Point", "coordinates": [-120.5, 36.1 + i, 8.123]}}
+            for i in range(3)
+        ]}
+        path = write_temp_file(self, '.geojson', json.dumps(feed))
+
+        call_command('import_alerts', path, '--batch-size', '2', stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual(Alert.objects.count(), 3)
+        alert = Alert.objects.get(description="0 km N of Testville")
+        self.assertEqual(alert.hazard_type, 'earthquake')
+        self.assertEqual(alert.hazard_data['magnitude'], 4.57)
+        self.assertEqual(alert.hazard_data['depth'], 8.12)
+        self.assertEqual(alert.source_url, "https://earthquake.usgs.gov/")
+        self.assertAlmostEqual(alert.location.y, 36.1)
+
+    def test_import_csv_with_errors_and_offset(self):
+        """
+        Records before the offset are skipped, invalid rows are reported.
+        """
+        path = write_temp_file(self, '.csv', "\n".join([
+            "latitude,longitude,description,severity,water_level",
+            "10,20,Flood one,major,1.5",
+            "not-a-number,20,Bad location,low,1",
+            "11,21,Flood two,catastrophic,1",
+            "12,22,Flood three,low,2",
+        ]))
+
+        stderr = StringIO()
+        call_command('import_alerts', path, '--hazard-type', 'flood', '--offset', '1',
+                     stdout=StringIO(), stderr=stderr)
+
+        self.assertEqual(list(Alert.objects.values_list('description', flat=True)), ["Flood three"])
+        self.assertIn("Record 1", stderr.getvalue())
+        self.assertIn("Record 2", stderr.getvalue())
+
+    def test_import_ndjson_malformed_line(self):
+        """
+        A malformed NDJSON line fails on its own and the next lines are imported.
+        """
+        path = write_temp_file(self, '.ndjson', "\n".join([
+            json.dumps({"lat": 1, "lng": 2, "description": "First"}),
+            '{"lat": 3, "lng": ',
+            "[1, 2]",
+            json.dumps({"lat": 5, "lng": 6, "description": "Last"}),
+        ]))
+
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_alerts', path, '--hazard-type', 'flood', stdout=stdout, stderr=stderr)
+
+        self.assertEqual(sorted(Alert.objects.values_list('description', flat=True)), ["First", "Last"])
+        self.assertIn("Record 1: Invalid JSON", stderr.getvalue())
+        self.assertIn("Record 2: Not a JSON object.", stderr.getvalue())
+        self.assertIn("Imported 2 alerts (2 failed)", stdout.getvalue())
+
+    def test_import_invalid_field(self):
+        """
+        A value the database would reject (over-long source_url) fails its
+        record only.
+        """
+        path = write_temp_file(self, '.csv', "\n".join([
+            "lat,lng,description,source_url",
+            "10,20,Good,https://example.com/",
+            f"11,21,Bad,https://example.com/{'a' * 250}",
+        ]))
+
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_alerts', path, '--hazard-type', 'flood', stdout=stdout, stderr=stderr)
+
+        self.assertEqual(list(Alert.objects.values_list('description', flat=True)), ["Good"])
+        self.assertIn("Record 1: {'source_url'", stderr.getvalue())
+        self.assertIn("Imported 1 alerts (1 failed)", stdout.getvalue())
+
+
+class ExportAlertsCommandTest(TestCase):
+    """
+    Test case for the export_alerts management command.
+
+    This class verifies that:
+      - A gzip compressed CSV export can be imported back with import_alerts.
+    """
+
+    def test_export_csv_round_trip(self):
+        call_command('import_alerts', '--format', 'ndjson', '--hazard-type', 'earthquake',
+                     write_temp_file(self, '.ndjson', json.dumps(
+                         {"lat": 5, "lng": 6, "description": "Quake", "magnitude": 5.1})),
+                     stdout=StringIO(), stderr=StringIO())
+        path = write_temp_file(self, '.csv.gz', '')
+
+        call_command('export_alerts', path, '--format', 'csv', stderr=StringIO())
+        Alert.objects.all().delete()
+        with gzip.open(path, 'rt') as f:
+            content = f.read()
+        call_command('import_alerts', write_temp_file(self, '.csv', content),
+                     stdout=StringIO(), stderr=StringIO())
+
+        alert = Alert.objects.get()
+        self.assertEqual(alert.description, "Quake")
+        self.assertEqual(alert.hazard_type, 'earthquake')
+        self.assertEqual(alert.hazard_data['magnitude'], 5.1)
+
 
 class AlertDeleteViewTest(TestCase):
     """
@@ -952,6 +1731,44 @@ class AlertVoteViewTest(TestCase):
         self.assertIsNotNone(vote)
         self.assertFalse(vote.vote)
 
+    def test_votes_from_several_users_accumulate(self):
+        """
+        Votes from different users are all counted, and the vote does not
+        overwrite other columns changed since the alert was loaded.
+        """
+        other_voter = User.objects.create_user(
+            username='other_voter',
+            password='testpass',
+            email='other_voter@example.com',
+            user_type=1
+        )
+        self.client.login(username='voter', password='testpass')
+        self.client.post(self.vote_url, data={'vote': '1'})
+        Alert.objects.filter(pk=self.alert.pk).update(description="Edited meanwhile")
+        self.client.login(username='other_voter', password='testpass')
+        self.client.post(self.vote_url, data={'vote': '1'})
+
+        self.alert.refresh_from_db()
+        self.owner.refresh_from_db()
+        self.assertEqual(self.alert.positive_votes, 2)
+        self.assertEqual(self.alert.description, "Edited meanwhile")
+        self.assertEqual(self.owner.alerts_upvoted, 2)
+        self.assertEqual(AlertUserVote.objects.filter(user=other_voter).count(), 1)
+
+    def test_vote_on_alert_without_owner(self):
+        """
+        Voting on an alert without a reporter only updates the alert counts.
+        """
+        Alert.objects.filter(pk=self.alert.pk).update(reported_by=None)
+        self.client.login(username='voter', password='testpass')
+        response = self.client.post(self.vote_url, data={'vote': '1'})
+        self.assertEqual(response.status_code, 302)
+
+        self.alert.refresh_from_db()
+        self.owner.refresh_from_db()
+        self.assertEqual(self.alert.positive_votes, 1)
+        self.assertEqual(self.owner.alerts_upvoted, 0)
+
     def test_invalid_vote_value(self):
         """
         An invalid vote value should return a 400 Bad Request.
@@ -973,6 +1790,73 @@ class AlertVoteViewTest(TestCase):
         self.assertIsNone(vote)
 
 
+@override_settings(VOTE_BUFFERING=True)
+class BufferedVoteTest(TestCase):
+    """
+    Test case for the buffered (write-behind) vote mode.
+
+    This class verifies that:
+      - Votes are recorded immediately while the counter changes are buffered.
+      - The alert details page merges the buffered votes.
+      - The flush task folds the buffered votes into the counters, with one
+        UPDATE per owner.
+    """
+
+    def setUp(self):
+        self.owner = UserFactory()
+        self.voters = UserFactory.create_batch(3)
+        self.alert = AlertFactory(reported_by=self.owner, positive_votes=0, negative_votes=0)
+        self.vote_url = reverse('vote_alert', kwargs={'pk': self.alert.pk})
+
+    def vote(self, voter, value):
+        self.client.force_login(voter)
+        return self.client.post(self.vote_url, data={'vote': value})
+
+    def test_votes_are_buffered_and_flushed(self):
+        """
+        Counters only change once the buffered deltas are flushed.
+        """
+        self.vote(self.voters[0], '1')
+        self.vote(self.voters[1], '1')
+        self.vote(self.voters[2], '-1')
+        # Changing a vote is buffered as well.
+        self.vote(self.voters[1], '-1')
+
+        self.alert.refresh_from_db()
+        self.assertEqual(self.alert.positive_votes, 0)
+        self.assertEqual(AlertUserVote.objects.filter(alert=self.alert).count(), 3)
+        self.assertEqual(PendingVoteDelta.objects.count(), 4)
+
+        response = self.client.get(reverse('alert_details', kwargs={'pk': self.alert.pk}))
+        self.assertEqual(response.context['alert'].live_positive_votes, 1)
+        self.assertEqual(response.context['alert'].live_negative_votes, 2)
+
+        flush_vote_deltas()
+        self.alert.refresh_from_db()
+        self.owner.refresh_from_db()
+        self.assertEqual(self.alert.positive_votes, 1)
+        self.assertEqual(self.alert.negative_votes, 2)
+        self.assertEqual(self.owner.alerts_upvoted, 1)
+        self.assertFalse(PendingVoteDelta.objects.exists())
+
+    def test_flush_updates_each_owner_once(self):
+        """
+        Upvotes on several alerts of the same owner are folded into one UPDATE.
+        """
+        other_alert = AlertFactory(reported_by=self.owner, positive_votes=0, negative_votes=0)
+        self.vote(self.voters[0], '1')
+        self.client.force_login(self.voters[1])
+        self.client.post(reverse('vote_alert', kwargs={'pk': other_alert.pk}), data={'vote': '1'})
+
+        with CaptureQueriesContext(connection) as queries:
+            flush_vote_deltas()
+        owner_updates = [query for query in queries.captured_queries
+                         if query['sql'].startswith('UPDATE "users_user" SET "alerts_upvoted"')]
+        self.assertEqual(len(owner_updates), 1)
+        self.owner.refresh_from_db()
+        self.assertEqual(self.owner.alerts_upvoted, 2)
+
+
 class ArchiveAlertViewTest(TestCase):
     """
     Test case for the ArchiveAlertView.
@@ -982,6 +1866,7 @@ class ArchiveAlertViewTest(TestCase):
       - An ambassador can archive an alert.
       - A normal user cannot archive an alert.
       - An anonymous user is redirected to the login page.
+      - Archiving keeps the votes counted since the alert was loaded.
     """
     
     def setUp(self):
@@ -1067,3 +1952,17 @@ class ArchiveAlertViewTest(TestCase):
         self.alert.refresh_from_db()
         self.assertTrue(self.alert.is_active)
 
+    def test_archive_keeps_concurrent_votes(self):
+        """
+        A vote counted after the alert was loaded is not overwritten.
+        """
+        stale = Alert.objects.get(pk=self.alert.pk)
+        Alert.objects.filter(pk=self.alert.pk).update(positive_votes=F('positive_votes') + 5)
+        self.client.login(username='admin', password='testpass')
+        with patch("alerts.views.get_object_or_404", return_value=stale):
+            response = self.client.post(self.archive_url)
+        self.assertEqual(response.status_code, 302)
+        self.alert.refresh_from_db()
+        self.assertFalse(self.alert.is_active)
+        self.assertEqual(self.alert.positive_votes, 5)
+
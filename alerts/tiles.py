@@ -0,0 +1,94 @@
+# Python Imports
+import math
+
+# Django Imports
+from django.db import connection
+
+# Local Imports
+from .models import Alert
+
+# Seconds a tile may be cached by the server and the browsers.
+TILE_CACHE_SECONDS = 60
+# Highest zoom level served.
+TILE_MAX_ZOOM = 22
+# Tile resolution and the margin kept around it so shapes are not cut at the edges.
+TILE_EXTENT = 4096
+TILE_BUFFER = 256
+# Largest effect radius of an alert (meters), to find the circles reaching a tile.
+MAX_EFFECT_RADIUS = 100000
+METERS_PER_DEGREE = 111320
+
+TILE_SQL = """
+    WITH bounds AS (
+        SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS geom,
+               ST_Transform(ST_TileEnvelope(%(z)s, %(x)s, %(y)s), 4326) AS area
+    ),
+    alerts AS (
+        SELECT alert.id, alert.hazard_type,
+               alert.positive_votes, alert.negative_votes, alert.effect_radius,
+               ST_AsMVTGeom(ST_Transform(alert.location::geometry, 3857), bounds.geom,
+                            %(extent)s, %(buffer)s) AS geom
+        FROM {alert_table} alert
+        CROSS JOIN bounds
+        WHERE alert.is_active AND alert.location::geometry && bounds.area
+    ),
+    radius AS (
+        SELECT alert.id, alert.hazard_type,
+               ST_AsMVTGeom(ST_Transform(ST_Buffer(alert.location, alert.effect_radius)::geometry, 3857),
+                            bounds.geom, %(extent)s, %(buffer)s) AS geom
+        FROM {alert_table} alert
+        CROSS JOIN bounds
+        WHERE alert.is_active
+          AND alert.location::geometry && ST_Expand(bounds.area, %(margin_lng)s, %(margin_lat)s)
+          AND ST_Buffer(alert.location, alert.effect_radius)::geometry && bounds.area
+    )
+    SELECT COALESCE((SELECT ST_AsMVT(alerts, 'alerts', %(extent)s, 'geom')
+                     FROM alerts WHERE geom IS NOT NULL), ''::bytea)
+        || COALESCE((SELECT ST_AsMVT(radius, 'radius', %(extent)s, 'geom')
+                     FROM radius WHERE geom IS NOT NULL), ''::bytea)
+"""
+
+
+def is_valid_tile(z, x, y):
+    """
+    Check that the tile coordinates exist at this zoom level.
+    """
+    return 0 <= z <= TILE_MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def tile_radius_margin(z, y):
+    """
+    Degrees (lng, lat) an effect radius circle can reach past the tile edges.
+
+    * A degree of longitude shrinks towards the poles, so the margin is
+      computed at the tile latitude closest to a pole.
+    """
+    n = 2 ** z
+    max_lat = max(abs(math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n)))))
+                  for row in (y, y + 1))
+    margin_lat = MAX_EFFECT_RADIUS / METERS_PER_DEGREE
+    cos_lat = math.cos(math.radians(min(max_lat + margin_lat, 90)))
+    margin_lng = 180 if cos_lat < 1e-6 else min(180, margin_lat / cos_lat)
+    return margin_lng, margin_lat
+
+
+def alert_tile(z, x, y):
+    """
+    Build the Mapbox Vector Tile of the active alerts for a z/x/y tile.
+
+    * The "alerts" layer holds the alert points with their id, hazard type,
+      vote counts and effect radius.
+    * The "radius" layer holds the effect radius circles with their id and
+      hazard type.
+    * Alerts are matched in planar lng/lat space against the tile envelope
+      (`alert_location_geom_idx`), a geography envelope is degenerate at
+      zoom 0 and bulges towards the poles at low zooms.
+    * Returns the tile as bytes (empty when no alert touches the tile).
+    """
+    sql = TILE_SQL.format(alert_table=connection.ops.quote_name(Alert._meta.db_table))
+    margin_lng, margin_lat = tile_radius_margin(z, y)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {'z': z, 'x': x, 'y': y,
+                             'extent': TILE_EXTENT, 'buffer': TILE_BUFFER,
+                             'margin_lng': margin_lng, 'margin_lat': margin_lat})
+        return bytes(cursor.fetchone()[0])
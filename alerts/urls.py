@@ -3,7 +3,8 @@ from django.urls import path
 
 # Local Imports
 from .views import (ManageAlertsView, CreateAlertView,
-                    HomeView, AlertGeoJsonListView, AlertsPaginatedView,
+                    HomeView, AlertGeoJsonListView, AlertClusterView, AlertTileView,
+                    AlertsPaginatedView,
                     AlertVoteView, AlertDetailsAndEditView, AlertDeleteView,
                     ArchiveAlertView, AboutView)
 
@@ -24,6 +25,12 @@ urlpatterns = [
     # Path endpoint for the  all Alerts in GeoJSON format (Used for the map)
     path('geojson/', AlertGeoJsonListView.as_view(), name='alerts-geojson'),
 
+    # Path endpoint for the alerts clustered per zoom level (Used for the map)
+    path('clusters/', AlertClusterView.as_view(), name='alerts-clusters'),
+
+    # Path endpoint for the alerts as Mapbox Vector Tiles (Used for the map)
+    path('tiles/<int:z>/<int:x>/<int:y>.mvt', AlertTileView.as_view(), name='alerts-tiles'),
+
     # Path endpoint for paginated alerts (Used for AJAX request)
     path('paginated_alerts/', AlertsPaginatedView.as_view(), name='paginated_alert'),
 
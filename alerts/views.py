@@ -3,33 +3,42 @@ import logging
 
 # Django Imports
 from django.shortcuts import redirect, get_object_or_404
-from django.http import HttpResponseBadRequest, HttpResponseForbidden
+from django.http import (HttpResponse, HttpResponseBadRequest, HttpResponseForbidden,
+                         StreamingHttpResponse)
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_page
 from rest_framework.views import APIView
 from django.views import View
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.gis.geos import Point
-from geopy.geocoders import Nominatim
 from django.views.generic import (
     TemplateView, DeleteView, UpdateView
 )
 from django.core.paginator import Paginator
 from rest_framework import generics
-from django.db.models import Q
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.contenttypes.models import ContentType
-from django.forms.models import model_to_dict
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import SessionAuthentication
 from django.urls import reverse
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import BadRequest, PermissionDenied
+from django.conf import settings
 
 
 # Local Imports
-from .serializers import AlertGeoSerializer
+from .serializers import AlertGeoSerializer, stream_feature_collection
 from .models import (Alert, Earthquake, Flood, Tornado, Fire, AlertUserVote)
 from .forms import AlertForm
+from .tasks import schedule_geocoding
+from .votes import cast_vote
+from .pagination import keyset_page
+from .sync import alert_changes, changes_response_data
+from .caching import conditional_alert_get, cached_alert_get
+from .clustering import cluster_alerts, CLUSTER_MAX_ZOOM
+from .tiles import alert_tile, is_valid_tile, TILE_CACHE_SECONDS
 from users.models import User
+from users.tasks import promote_ambassadors
 
 # Simple mapping of hazard types to model names
 # This is a temporary solution and should be replaced with a more robust solution
@@ -42,6 +51,37 @@ HAZARD_MODEL_MAPPING = {
 }
 
 
+def paginate_alerts(request, alerts, per_page):
+    """
+    Paginate the alerts by page number, or by keyset when a `cursor` is sent.
+
+    * The keyset mode has a constant cost per page (no COUNT(*), no OFFSET).
+    * An invalid cursor is a bad request, like in the paginated alerts API.
+    """
+    if 'cursor' in request.GET:
+        try:
+            return keyset_page(alerts, request.GET['cursor'], per_page)
+        except ValueError as e:
+            raise BadRequest(str(e))
+    paginator = Paginator(alerts, per_page)
+    return paginator.get_page(request.GET.get('page', 1))
+
+
+def hazard_details_display(alert, placeholder):
+    """
+    Hazard details of an alert for the templates.
+
+    * Read from the `hazard_data` copy on the alert, without the hazard id.
+    * Missing values are replaced by the placeholder.
+    """
+    if alert.hazard_data is None:
+        return None
+    return {
+        key: placeholder if value is None else value
+        for key, value in alert.hazard_data.items() if key != 'id'
+    }
+
+
 class HomeView(TemplateView):
     """
     View class for the home page.
@@ -54,20 +94,13 @@ class HomeView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # filter alerts by the is_active field
-        alerts = Alert.objects.filter(is_active=True).order_by('-created_at')
-        paginator = Paginator(alerts, 4)
-        page_number = self.request.GET.get('page', 1)
-        page_obj = paginator.get_page(page_number)
+        alerts = Alert.objects.filter(is_active=True).select_related(
+            'reported_by').order_by('-created_at')
+        page_obj = paginate_alerts(self.request, alerts, 4)
 
-        # Inject hazard type information on each alert
+        # Inject hazard details information on each alert
         for alert in page_obj:
-            alert.hazard_type = alert.content_type.model if alert.content_type else None
-            alert.hazard_details_dict = model_to_dict(
-                alert.hazard_details) if alert.hazard_details else None
-            del alert.hazard_details_dict['id']
-            for key in alert.hazard_details_dict:
-                if alert.hazard_details_dict[key] is None:
-                    alert.hazard_details_dict[key] = "Not provided"
+            alert.hazard_details_dict = hazard_details_display(alert, "Not provided")
         context['page_obj'] = page_obj
         
         # Add User's vote status
@@ -101,32 +134,133 @@ class ManageAlertsView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # filter alerts by the is_active field
-        alerts = Alert.objects.filter(is_active=True).order_by('-created_at')
-        paginator = Paginator(alerts, 4)
-        page_number = self.request.GET.get('page', 1)
-        page_obj = paginator.get_page(page_number)
+        alerts = Alert.objects.filter(is_active=True).select_related(
+            'reported_by').order_by('-created_at')
+        page_obj = paginate_alerts(self.request, alerts, 4)
 
-        # Inject hazard type information on each alert
+        # Inject hazard details information on each alert
         for alert in page_obj:
-            alert.hazard_type = alert.content_type.model if alert.content_type else None
-            alert.hazard_details_dict = model_to_dict(
-                alert.hazard_details) if alert.hazard_details else None
-            del alert.hazard_details_dict['id']
-            for key in alert.hazard_details_dict:
-                if alert.hazard_details_dict[key] is None:
-                    alert.hazard_details_dict[key] = "Not Provided"
+            alert.hazard_details_dict = hazard_details_display(alert, "Not Provided")
         context['page_obj'] = page_obj
         return context
 
 
+@conditional_alert_get
+@cached_alert_get
 class AlertGeoJsonListView(generics.ListAPIView):
     """
     Returns all active alerts in GeoJSON format along with the hazard type and details.
 
     * Alerts are filtered by the `is_active` field.
+    * The FeatureCollection is streamed while the alerts are read in chunks,
+      so memory stays flat and the first bytes are sent right away.
+    * Hazard details are read from the alert row, so the number of queries
+      does not grow with the number of alerts.
+    * Send `since` (empty for the first sync) to only get the changes since
+      the previous poll, see `alerts.sync`.
+    * Answers conditional requests (If-None-Match / If-Modified-Since) with
+      a 304 when no alert changed.
+    * Rendered responses are cached until the alert data changes.
     """
-    queryset = Alert.objects.filter(is_active=True)
+    queryset = Alert.objects.filter(is_active=True).select_related('reported_by')
     serializer_class = AlertGeoSerializer
+    chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        if 'since' in request.GET:
+            return self.list_changes(request)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            stream_feature_collection(queryset, self.get_serializer_class(), self.chunk_size),
+            content_type='application/json')
+
+    def list_changes(self, request):
+        """
+        Delta sync: the alerts changed since the `since` cursor.
+
+        * Archived alerts are included with `is_active` set to False and
+          deleted alerts are listed in `deleted`, so the map can drop them.
+        """
+        queryset = Alert.objects.select_related('reported_by')
+        try:
+            changes = alert_changes(queryset, request.GET['since'])
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(changes_response_data(
+            self.get_serializer(changes.alerts, many=True).data, changes))
+
+
+class AlertClusterView(APIView):
+    """
+    Returns the active alerts of the map viewport clustered per zoom level.
+
+    * Requires `zoom` (0-22) and `bbox` (min_lng,min_lat,max_lng,max_lat).
+    * Returns a GeoJSON FeatureCollection of points, each with the number of
+      alerts it groups and their dominant hazard type.
+    * At high zoom every alert is returned on its own, with its `alert_id`.
+    * The number of features is bounded whatever the number of alerts in view.
+    """
+
+    def get(self, request, *args, **kwargs):
+        try:
+            zoom = int(request.GET.get('zoom', ''))
+        except ValueError:
+            return Response({"error": "zoom must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= zoom <= 22:
+            return Response({"error": "zoom must be between 0 and 22."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            bbox = [float(value) for value in request.GET.get('bbox', '').split(',')]
+            min_lng, min_lat, max_lng, max_lat = bbox
+        except ValueError:
+            return Response({"error": "bbox must be min_lng,min_lat,max_lng,max_lat."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        # Leaflet bounds may go past the antimeridian when the map is panned.
+        min_lng, max_lng = max(min_lng, -180), min(max_lng, 180)
+        min_lat, max_lat = max(min_lat, -90), min(max_lat, 90)
+        if not (min_lng < max_lng and min_lat < max_lat):
+            return Response({"error": "Invalid bounding box coordinates."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        features = []
+        for cluster in cluster_alerts((min_lng, min_lat, max_lng, max_lat), zoom):
+            properties = {
+                "count": cluster['count'],
+                "hazard_type": cluster['hazard_type'],
+            }
+            if cluster['count'] == 1:
+                properties["alert_id"] = cluster['alert_id']
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [cluster['lng'], cluster['lat']]},
+                "properties": properties,
+            })
+
+        return Response({
+            "type": "FeatureCollection",
+            "clustered": zoom < CLUSTER_MAX_ZOOM,
+            "features": features,
+        }, status=status.HTTP_200_OK)
+
+
+@method_decorator(cache_page(TILE_CACHE_SECONDS), name='get')
+class AlertTileView(View):
+    """
+    Returns the active alerts of a z/x/y map tile as a Mapbox Vector Tile.
+
+    * Tiles are built in the database with `ST_AsMVT` and hold an "alerts"
+      point layer and a "radius" layer with the effect radius circles.
+    * Tiles (empty ones included) are cached by the server and browsers
+      for a short time.
+    """
+
+    def get(self, request, z, x, y, *args, **kwargs):
+        if not is_valid_tile(z, x, y):
+            return HttpResponseBadRequest("Invalid tile coordinates.")
+
+        return HttpResponse(alert_tile(z, x, y),
+                            content_type='application/vnd.mapbox-vector-tile')
 
 
 class CreateAlertView(APIView):
@@ -145,7 +279,8 @@ class CreateAlertView(APIView):
         Create a new alert.
 
         * Validates the input data.
-        * Reverse geocodes the latitude and longitude.
+        * Saves the alert right away, the country, city and county are
+          filled in later by the `geocode_alert` task.
         """
         data = request.data
     
@@ -160,20 +295,13 @@ class CreateAlertView(APIView):
         if effect_radius is not None and effect_radius > 100000 or effect_radius < 0:
             return Response({"error": "The radius of effect cannot exceed 100 km (100,000 meters)."}, status=400)
 
-        # Reverse Geocoding
-        try:
-            geolocator = Nominatim(user_agent="enviroalerts")
-            location = geolocator.reverse((lat, lng), language="en")
-            address = location.raw.get('address', {}) if location else {}
-        except Exception as e:
-            return Response({"error": f"Geocoding failed: {str(e)}"}, status=400)
-
         # Automatically set `reported_by` to the logged-in user
         current_user = request.user if request.user.is_authenticated else None
 
         if current_user:
             current_user.alerts_created += 1
             current_user.save()
+            promote_ambassadors([current_user.pk])
         else:
             return Response({"error": "You must be logged in to create an alert."}, status=400)
 
@@ -182,6 +310,7 @@ class CreateAlertView(APIView):
         hazard_data = data.get('hazard_data', {})
         content_type = None
         object_id = None
+        hazard_instance = None
 
         # Preprocess hazard_data to ensure no empty strings are passed to the model
         hazard_data = {
@@ -209,13 +338,15 @@ class CreateAlertView(APIView):
                 effect_radius=data.get('effect_radius'),
                 reported_by=current_user,
                 source_url=data.get('source_url', None),
-                country=address.get('country', ''),
-                city=address.get('city', address.get('town', '')),
-                county=address.get('county', ''),
+                country='',
+                city='',
+                county='',
                 # Associated the hazard-specific model with the alert
                 content_type=content_type,
-                object_id=object_id
+                object_id=object_id,
+                hazard_details=hazard_instance
             )
+            schedule_geocoding(alert.id)
             # Build response data to dynamically update the map and list of alerts
             response_data = {
                 "id": alert.id,
@@ -244,13 +375,18 @@ class CreateAlertView(APIView):
             return Response({"error": f"Error creating Alert: {str(e)}"}, status=400)
 
 
+@conditional_alert_get
 class AlertsPaginatedView(APIView):
     """
     Paginated view for the alerts in the alert list element.
 
     * Returns the alerts in JSON format.
     * Supports search queries.
-    * Paginates the alerts.
+    * Paginates the alerts by page number, or by keyset when a `cursor`
+      is sent (empty for the first page). The cursor is ignored while
+      searching, so the results stay ordered by relevance.
+    * Answers conditional requests (If-None-Match / If-Modified-Since) with
+      a 304 when no alert changed.
     """
 
     def get(self, request, *args, **kwargs):
@@ -259,55 +395,68 @@ class AlertsPaginatedView(APIView):
 
         * The user can search for an alert by description, hazard type, 
         country, city, or county.
+        * Search results are ordered by relevance.
         """
         # Grab the optional search term from the query string
         search_query = request.GET.get('q', '')
 
+        alerts = Alert.objects.select_related('reported_by')
         if search_query:
             # Filter alerts by the search query and is active field
-            alerts = Alert.objects.filter(
-                Q(description__icontains=search_query) |
-                Q(content_type__model__icontains=search_query) |
-                Q(country__icontains=search_query) |
-                Q(city__icontains=search_query) |
-                Q(county__icontains=search_query),
-                is_active=True
-            ).order_by('-created_at')
+            # Full-text search ranked by relevance, backed by a GIN index
+            alerts = alerts.filter(is_active=True).search(search_query)
         else:
-            alerts = Alert.objects.filter(
+            alerts = alerts.filter(
                 is_active=True).order_by('-created_at')
 
+        # Search results keep their relevance order, so they are always paged by number
+        if 'cursor' in request.GET and not search_query:
+            # Keyset pagination: constant cost per page, no page count
+            try:
+                page_obj = keyset_page(alerts, request.GET['cursor'], 4)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({
+                "alerts": [self.serialize_alert(alert) for alert in page_obj],
+                "next_cursor": page_obj.next_cursor,
+                "has_next": page_obj.has_next(),
+                "has_previous": page_obj.has_previous()
+            }, status=status.HTTP_200_OK)
+
         paginator = Paginator(alerts, 4)
         page_number = request.GET.get('page', 1)
         page_obj = paginator.get_page(page_number)
 
-        alerts_data = []
-        for alert in page_obj:
-            alerts_data.append({
-                "id": alert.id,
-                "description": alert.description,
-                "location": {
-                    "type": "Point",
-                    "coordinates": [alert.location.x, alert.location.y]
-                },
-                "effect_radius": alert.effect_radius,
-                "hazard_type": alert.content_type.model if alert.content_type else None,
-                "hazard_details": model_to_dict(alert.hazard_details) if alert.hazard_details else None,
-                "reported_by": str(alert.reported_by) if alert.reported_by else None,
-                "source_url": alert.source_url,
-                "country": alert.country,
-                "city": alert.city,
-                "county": alert.county,
-                "created_at": alert.created_at.isoformat()
-            })
         return Response({
-            "alerts": alerts_data,
+            "alerts": [self.serialize_alert(alert) for alert in page_obj],
             "page": page_obj.number,
             "num_pages": paginator.num_pages,
             "has_next": page_obj.has_next(),
             "has_previous": page_obj.has_previous()
         }, status=status.HTTP_200_OK)
 
+    def serialize_alert(self, alert):
+        """
+        Build the JSON data of an alert for the alert list element.
+        """
+        return {
+            "id": alert.id,
+            "description": alert.description,
+            "location": {
+                "type": "Point",
+                "coordinates": [alert.location.x, alert.location.y]
+            },
+            "effect_radius": alert.effect_radius,
+            "hazard_type": alert.hazard_type,
+            "hazard_details": alert.hazard_data,
+            "reported_by": str(alert.reported_by) if alert.reported_by else None,
+            "source_url": alert.source_url,
+            "country": alert.country,
+            "city": alert.city,
+            "county": alert.county,
+            "created_at": alert.created_at.isoformat()
+        }
+
 
 class AlertDetailsAndEditView(UpdateView):
     """
@@ -325,7 +474,11 @@ class AlertDetailsAndEditView(UpdateView):
         """
         Retrieves the alert object.
         """
-        alert = get_object_or_404(Alert, pk=self.kwargs.get('pk'))
+        alerts = Alert.objects.all()
+        # Show the votes that are still buffered as well
+        if settings.VOTE_BUFFERING:
+            alerts = alerts.with_pending_votes()
+        alert = get_object_or_404(alerts, pk=self.kwargs.get('pk'))
         return alert
 
     def get_context_data(self, **kwargs):
@@ -355,17 +508,8 @@ class AlertDetailsAndEditView(UpdateView):
             'can_delete': can_edit,
         })
 
-        # Add hazard type and details
-        alert.hazard_type = alert.content_type.model if alert.content_type else None
-        alert.hazard_details_dict = model_to_dict(
-            alert.hazard_details) if alert.hazard_details else None
-        if alert.hazard_details_dict is not None:
-            del alert.hazard_details_dict['id']
-        
-        if alert.hazard_details_dict is not None:
-            for key in alert.hazard_details_dict:
-                if alert.hazard_details_dict[key] is None:
-                    alert.hazard_details_dict[key] = "N/A"
+        # Add hazard details
+        alert.hazard_details_dict = hazard_details_display(alert, "N/A")
 
         # Insert the user's vote status
         if self.request.user.is_authenticated:
@@ -450,65 +594,17 @@ class AlertVoteView(LoginRequiredMixin, View):
         Handle the POST request for voting on an alert.
 
         * Validates the vote type.
-        * Updates the vote count for the alert.
-        * Creates an instance of the vote model.
+        * Creates, changes or removes the user's vote.
+        * Updates the vote counts of the alert and its owner atomically.
         """
-        alert = get_object_or_404(Alert, pk=pk)
-
-        # retrieve the user that owns the alert
-        user = alert.reported_by
+        alert = get_object_or_404(Alert.objects.only('id', 'reported_by'), pk=pk)
 
         vote_value = request.POST.get('vote')
 
         if vote_value not in ['1', '-1']:
             return HttpResponseBadRequest("Invalid vote type.")
 
-        is_upvote = (vote_value == '1')
-
-        #
-        user_vote, created = AlertUserVote.objects.get_or_create(
-            alert=alert,
-            user=request.user,
-            defaults={'vote': is_upvote}
-        )
-
-        # Update the vote count for the alert
-        # Update the Alert's owner upvote count
-        if not created:
-            if user_vote.vote != is_upvote:
-                # Change the vote if the user votes differently
-                if is_upvote:
-                    alert.negative_votes -= 1
-                    alert.positive_votes += 1
-                    # Remove the vote from the user's upvote count
-                    user.alerts_upvoted += 1
-                else:
-                    alert.positive_votes -= 1
-                    alert.negative_votes += 1
-                    user.alerts_upvoted -= 1
-                user_vote.vote = is_upvote
-                user_vote.save()
-            else:
-                # delete the vote if the user votes the same way
-                # Remove the vote from the user's upvote count
-                if is_upvote:
-                    print("Deleting upvote")
-                    alert.positive_votes -= 1
-                    user.alerts_upvoted -= 1
-                else:
-                    alert.negative_votes -= 1
-                user_vote.delete()
-                alert.save()
-                user.save()
-                return redirect('alert_details', pk=pk)
-        else:
-            if is_upvote:
-                alert.positive_votes += 1
-                user.alerts_upvoted += 1
-            else:
-                alert.negative_votes += 1
-        user.save()
-        alert.save()
+        cast_vote(alert, request.user, is_upvote=(vote_value == '1'))
         return redirect('alert_details', pk=pk)
 
 
@@ -535,12 +631,21 @@ class ArchiveAlertView(LoginRequiredMixin, UpdateView):
             # return HttpResponseForbidden("You do not have permission to archive this alert.")
             raise PermissionDenied("You do not have permission to delete this alert.")
 
-        # Set the alert to inactive
+        # Set the alert to inactive, without writing back the vote counters
+        # that may be changing concurrently
         alert.is_active = False
-        alert.save()
+        alert.save(update_fields=['is_active', 'updated_at'])
 
         return alert
 
+    def form_valid(self, form):
+        """
+        Saves only the archive flag of the alert.
+        """
+        self.object = form.save(commit=False)
+        self.object.save(update_fields=['is_active', 'updated_at'])
+        return redirect(self.get_success_url())
+
     def user_can_archive(self, alert):
         """
         Checks if the user has permission to archive the alert.
@@ -0,0 +1,151 @@
+# Python Imports
+from collections import namedtuple
+
+# Django Imports
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now
+
+# Local Imports
+from .models import Alert, AlertUserVote, PendingVoteDelta
+from .caching import bump_alert_data_version
+from users.models import User
+from users.tasks import promote_ambassadors
+
+# Change to apply to an alert's positive and negative vote counters.
+# The owner's alerts_upvoted counter follows the positive delta.
+VoteDelta = namedtuple('VoteDelta', ['positive', 'negative'])
+
+
+def record_vote(alert_id, user, is_upvote):
+    """
+    Insert, change or remove the user's vote on an alert.
+
+    * A new vote is inserted.
+    * Voting the same way twice removes the vote.
+    * Voting the other way changes the vote.
+    * Returns the VoteDelta to apply to the counters.
+    * Must run inside a transaction, the existing vote row is locked.
+    """
+    user_vote, created = AlertUserVote.objects.get_or_create(
+        alert_id=alert_id,
+        user=user,
+        defaults={'vote': is_upvote}
+    )
+    if created:
+        return VoteDelta(1, 0) if is_upvote else VoteDelta(0, 1)
+
+    # Lock the row and re-read the vote so concurrent requests of the same
+    # user are applied one after the other.
+    user_vote = AlertUserVote.objects.select_for_update().filter(pk=user_vote.pk).first()
+    if user_vote is None:
+        return VoteDelta(0, 0)
+
+    if user_vote.vote == is_upvote:
+        user_vote.delete()
+        return VoteDelta(-1, 0) if is_upvote else VoteDelta(0, -1)
+
+    user_vote.vote = is_upvote
+    user_vote.save(update_fields=['vote'])
+    return VoteDelta(1, -1) if is_upvote else VoteDelta(-1, 1)
+
+
+def apply_vote_delta(alert_id, owner_id, delta):
+    """
+    Apply a VoteDelta with conditional `col = col +/- n` updates.
+
+    * Only the changed counters are written, nothing is read into Python.
+    * An owner that gained upvotes is checked for the ambassador promotion.
+    """
+    updates = {}
+    if delta.positive:
+        updates['positive_votes'] = F('positive_votes') + delta.positive
+    if delta.negative:
+        updates['negative_votes'] = F('negative_votes') + delta.negative
+    if updates:
+        Alert.objects.filter(pk=alert_id).update(updated_at=now(), **updates)
+
+    if owner_id:
+        apply_owner_upvotes({owner_id: delta.positive})
+
+
+def apply_owner_upvotes(upvotes):
+    """
+    Add upvotes ({owner id: count}) to the owners' `alerts_upvoted` counters.
+
+    * One UPDATE per owner, in id order so concurrent flushes cannot deadlock.
+    * The owners that gained upvotes are checked for the ambassador
+      promotion with a single UPDATE.
+    """
+    for owner_id, count in sorted(upvotes.items()):
+        if count:
+            User.objects.filter(pk=owner_id).update(alerts_upvoted=F('alerts_upvoted') + count)
+    promoted_ids = [owner_id for owner_id, count in upvotes.items() if count > 0]
+    if promoted_ids:
+        promote_ambassadors(promoted_ids)
+
+
+def buffer_vote_delta(alert_id, delta):
+    """
+    Store a VoteDelta to be folded into the counters later.
+
+    * Appends a row instead of updating the Alert row, so votes on the same
+      alert do not wait on each other.
+    """
+    if delta.positive or delta.negative:
+        PendingVoteDelta.objects.create(
+            alert_id=alert_id, positive=delta.positive, negative=delta.negative)
+
+
+def flush_vote_deltas(batch_size=5000):
+    """
+    Fold a batch of buffered vote deltas into the Alert and User counters.
+
+    * Deltas are summed per alert and, for the upvotes, per owner, so each
+      alert and each owner gets one UPDATE.
+    * Rows locked by another flush are skipped.
+    * Returns the number of deltas folded.
+    """
+    with transaction.atomic():
+        pending = list(PendingVoteDelta.objects.select_for_update(
+            skip_locked=True, of=('self',)
+        ).order_by('id').values_list(
+            'id', 'alert_id', 'alert__reported_by_id', 'positive', 'negative'
+        )[:batch_size])
+        if not pending:
+            return 0
+
+        alert_totals = {}
+        owner_upvotes = {}
+        for _, alert_id, owner_id, positive, negative in pending:
+            current = alert_totals.get(alert_id, VoteDelta(0, 0))
+            alert_totals[alert_id] = VoteDelta(
+                current.positive + positive, current.negative + negative)
+            if owner_id:
+                owner_upvotes[owner_id] = owner_upvotes.get(owner_id, 0) + positive
+
+        PendingVoteDelta.objects.filter(id__in=[row[0] for row in pending]).delete()
+        # Update in id order so concurrent flushes cannot deadlock.
+        for alert_id, delta in sorted(alert_totals.items()):
+            apply_vote_delta(alert_id, None, delta)
+        apply_owner_upvotes(owner_upvotes)
+        # The counters are updated without signals
+        bump_alert_data_version()
+    return len(pending)
+
+
+def cast_vote(alert, user, is_upvote):
+    """
+    Record a user's vote and update the counters in a single transaction.
+
+    * With VOTE_BUFFERING enabled, the counter change is buffered and
+      folded in later by the `flush_vote_deltas` task.
+    """
+    with transaction.atomic():
+        delta = record_vote(alert.pk, user, is_upvote)
+        if settings.VOTE_BUFFERING:
+            buffer_vote_delta(alert.pk, delta)
+        else:
+            apply_vote_delta(alert.pk, alert.reported_by_id, delta)
+    return delta
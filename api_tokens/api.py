@@ -1,27 +1,140 @@
+# Python Imports
+import tempfile
+
 # Django Imports
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import generics, mixins
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.parsers import JSONParser
+from rest_framework.exceptions import ValidationError
+from django.contrib.gis.geos import Point, Polygon
 
 # Local Imports
 from alerts.models import Alert
+from alerts.pagination import AlertCursorPagination
+from alerts.sync import alert_changes, changes_response_data
+from alerts.caching import conditional_alert_get, cached_alert_get
+from alerts.ingest import bulk_create_alerts
+from alerts.export import (EXPORT_FORMATS, EXPORT_CONTENT_TYPES, EXPORT_EXTENSIONS,
+                           filter_export_queryset, stream_ndjson, stream_csv, write_geoparquet)
+from .parsers import NDJSONParser
+from .throttling import RedisScopedRateThrottle
 from .serializers import ListAlertSerializer, CreateAlertSerializer
 
+@conditional_alert_get
+@cached_alert_get
 class ListAlertsAPIView(generics.ListAPIView):
     """
     API view to list all alerts.
 
     * Accepts GET requests.
     * Returns a list of all alerts in JSON format.
+    * Send `cursor` (empty for the first page) and an optional `page_size`
+      to page through the alerts with keyset pagination.
+    * Send `since` (empty for the first sync) to only get the alerts created,
+      updated or archived since the previous poll, the ids of the deleted
+      alerts and the `next_cursor` to send next time.
+    * Answers conditional requests (If-None-Match / If-Modified-Since) with
+      a 304 when no alert changed.
+    * Rendered responses are cached until the alert data changes.
     """
-    queryset = Alert.objects.all()
+    queryset = Alert.objects.select_related('reported_by')
     serializer_class = ListAlertSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = AlertCursorPagination
+
+    since_param = openapi.Parameter(
+        'since', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description="Delta sync cursor (next_cursor of the previous response, empty for the first sync).")
+
+    @swagger_auto_schema(manual_parameters=[since_param])
+    def get(self, request, *args, **kwargs):
+        if 'since' in request.query_params:
+            try:
+                changes = alert_changes(self.get_queryset(), request.query_params['since'])
+            except ValueError as e:
+                raise ValidationError({"since": str(e)})
+            return Response(changes_response_data(
+                self.get_serializer(changes.alerts, many=True).data, changes))
+        return super().list(request, *args, **kwargs)
+
+
+class NearbyAlertsAPIView(generics.ListAPIView):
+    """
+    API view to list the active alerts affecting a location or an area.
+
+    * Accepts GET requests with either `lat` and `lng` (and an optional
+      `radius` in meters) or a `bbox` (min_lng,min_lat,max_lng,max_lat).
+    * Returns only the alerts whose effect radius covers or intersects
+      the requested point, circle or bounding box, in GeoJSON format.
+    """
+    serializer_class = ListAlertSerializer
+    permission_classes = [IsAuthenticated]
+
+    MAX_RADIUS = 100000  # 100 km
 
+    lat_param = openapi.Parameter(
+        'lat', openapi.IN_QUERY, description="Latitude of the location.", type=openapi.TYPE_NUMBER)
+    lng_param = openapi.Parameter(
+        'lng', openapi.IN_QUERY, description="Longitude of the location.", type=openapi.TYPE_NUMBER)
+    radius_param = openapi.Parameter(
+        'radius', openapi.IN_QUERY, description="Search radius in meters (default 0, max 100000).",
+        type=openapi.TYPE_INTEGER)
+    bbox_param = openapi.Parameter(
+        'bbox', openapi.IN_QUERY, description="Bounding box: min_lng,min_lat,max_lng,max_lat.",
+        type=openapi.TYPE_STRING)
+
+    def get_queryset(self):
+        """
+        Filter the active alerts by the requested point or bounding box.
+        """
+        params = self.request.query_params
+        alerts = Alert.objects.filter(
+            is_active=True).select_related('reported_by')
+
+        if params.get('bbox'):
+            return alerts.intersecting(self.parse_bbox(params['bbox']))
+
+        lat = self.parse_float(params.get('lat'), 'lat', -90, 90)
+        lng = self.parse_float(params.get('lng'), 'lng', -180, 180)
+        radius = self.parse_float(params.get('radius', 0), 'radius', 0, self.MAX_RADIUS)
+        return alerts.near(Point(lng, lat, srid=4326), radius)
+
+    def parse_float(self, value, name, min_value, max_value):
+        """
+        Parse a numeric query parameter and check its range.
+        """
+        if value is None:
+            raise ValidationError({name: "This parameter is required (or provide a bbox)."})
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValidationError({name: "Must be a number."})
+        if not min_value <= value <= max_value:
+            raise ValidationError({name: f"Must be between {min_value} and {max_value}."})
+        return value
+
+    def parse_bbox(self, value):
+        """
+        Parse the bbox query parameter into a Polygon.
+        """
+        try:
+            min_lng, min_lat, max_lng, max_lat = (float(v) for v in value.split(','))
+        except ValueError:
+            raise ValidationError({"bbox": "Must be min_lng,min_lat,max_lng,max_lat."})
+        if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90):
+            raise ValidationError({"bbox": "Invalid bounding box coordinates."})
+        bbox = Polygon.from_bbox((min_lng, min_lat, max_lng, max_lat))
+        bbox.srid = 4326
+        return bbox
+
+    @swagger_auto_schema(manual_parameters=[lat_param, lng_param, radius_param, bbox_param])
     def get(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
@@ -41,7 +154,7 @@ class CreateAlertAPIView(generics.GenericAPIView,
     """
     permission_classes = [IsAuthenticated]
     serializer_class = CreateAlertSerializer
-    throttle_classes = [ScopedRateThrottle] # Throttle to limit the number of requests for this endpoint
+    throttle_classes = [RedisScopedRateThrottle] # Throttle to limit the number of requests for this endpoint
     throttle_scope = 'create_alert' # Scope for the throttle class
     
     @swagger_auto_schema(
@@ -49,4 +162,171 @@ class CreateAlertAPIView(generics.GenericAPIView,
     )
 
     def post(self, request, *args, **kwargs):
-        return self.create(request, *args, **kwargs)
\ No newline at end of file
+        return self.create(request, *args, **kwargs)
+
+
+class BulkCreateAlertsAPIView(generics.GenericAPIView):
+    """
+    API view to create many alerts in one request (e.g. sensor gateways).
+
+    * Accepts a JSON array of alerts, or NDJSON (`application/x-ndjson`,
+      one alert per line), up to 1000 alerts per request.
+    * Each alert has the same fields as in `create_alert`.
+    * Valid alerts are created in one transaction, invalid ones are reported.
+    * The location details are filled in in the background.
+    * Returns one result per alert, in the order they were sent, with a 201
+      status if all were created, 207 if only some were and 400 if none were.
+    * Request limit is 60 per hour per user token.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = CreateAlertSerializer
+    parser_classes = [JSONParser, NDJSONParser]
+    throttle_classes = [RedisScopedRateThrottle]
+    throttle_scope = 'bulk_create_alert'
+
+    MAX_ALERTS = 1000
+
+    @swagger_auto_schema(
+        request_body=openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+        responses={201: "All alerts created", 207: "Some alerts created", 400: "Bad Request"}
+    )
+    def post(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({"detail": "Expected a list of alerts."})
+        if not items:
+            raise ValidationError({"detail": "No alerts were sent."})
+        if len(items) > self.MAX_ALERTS:
+            raise ValidationError({"detail": f"At most {self.MAX_ALERTS} alerts can be sent at once."})
+
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                results[index] = {"index": index, "status": "error", "errors": serializer.errors}
+
+        created = bulk_create_alerts([data for _, data in valid], request.user)
+        for (index, _), (alert, errors) in zip(valid, created):
+            if alert is None:
+                results[index] = {"index": index, "status": "error", "errors": errors}
+            else:
+                results[index] = {"index": index, "status": "created", "id": alert.id}
+
+        created_count = sum(1 for result in results if result["status"] == "created")
+        if created_count == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created_count:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({
+            "created": created_count,
+            "failed": len(results) - created_count,
+            "results": results,
+        }, status=response_status)
+
+
+class ExportAlertsAPIView(generics.GenericAPIView):
+    """
+    API view to export the alerts in bulk, for datasets and analysis.
+
+    * Send `output` (ndjson, csv or geoparquet, default ndjson) and the
+      optional filters `hazard_type`, `country`, `active`, `since` and `until`.
+    * The hazard fields are flattened into their own columns.
+    * The alerts are read in chunks and streamed, gzip compressed on the fly
+      when the client accepts it. GeoParquet files are compressed per column.
+    * Request limit is 20 per hour per user token.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [RedisScopedRateThrottle]
+    throttle_scope = 'export_alerts'
+
+    CHUNK_SIZE = 2000
+
+    output_param = openapi.Parameter(
+        'output', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(EXPORT_FORMATS),
+        description="Export format (default ndjson).")
+    hazard_type_param = openapi.Parameter(
+        'hazard_type', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Only this hazard type.")
+    country_param = openapi.Parameter(
+        'country', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Only this country.")
+    active_param = openapi.Parameter(
+        'active', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN, description="Only active or archived alerts.")
+    since_param = openapi.Parameter(
+        'since', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description="Only alerts created at or after this ISO 8601 date and time (UTC without an offset).")
+    until_param = openapi.Parameter(
+        'until', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description="Only alerts created before this ISO 8601 date and time (UTC without an offset).")
+
+    def get_queryset(self):
+        try:
+            return filter_export_queryset(Alert.objects.all(), self.request.query_params)
+        except ValueError as e:
+            raise ValidationError({"detail": str(e)})
+
+    @swagger_auto_schema(
+        manual_parameters=[output_param, hazard_type_param, country_param,
+                           active_param, since_param, until_param],
+        responses={200: "The exported alerts", 400: "Bad Request",
+                   501: "GeoParquet is not available on this server"}
+    )
+    def get(self, request, *args, **kwargs):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({"output": f"Must be one of: {', '.join(EXPORT_FORMATS)}."})
+        queryset = self.get_queryset()
+        filename = f"alerts.{EXPORT_EXTENSIONS[output]}"
+
+        if output == 'geoparquet':
+            # Parquet writes its footer last, so the file is built before it is sent
+            file = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+            try:
+                write_geoparquet(queryset, file, self.CHUNK_SIZE)
+            except RuntimeError as e:
+                # pyarrow is not installed on this server
+                file.close()
+                return Response({"detail": str(e)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+            file.seek(0)
+            return FileResponse(file, as_attachment=True, filename=filename,
+                                content_type=EXPORT_CONTENT_TYPES[output])
+
+        stream = stream_ndjson if output == 'ndjson' else stream_csv
+        content = (chunk.encode() for chunk in stream(queryset, self.CHUNK_SIZE))
+        gzipped = self.accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if gzipped:
+            content = compress_sequence(content)
+
+        response = StreamingHttpResponse(content, content_type=EXPORT_CONTENT_TYPES[output])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    @staticmethod
+    def accepts_gzip(accept_encoding):
+        """
+        Whether an Accept-Encoding header accepts gzip, with its q-values.
+
+        * `gzip;q=0` refuses gzip, `*` covers gzip when it is not listed.
+        """
+        qualities = {}
+        for coding in accept_encoding.split(','):
+            name, _, params = coding.partition(';')
+            quality = 1.0
+            for param in params.split(';'):
+                key, _, value = param.partition('=')
+                if key.strip().lower() == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            qualities[name.strip().lower()] = quality
+        for name in ('gzip', 'x-gzip', '*'):
+            if name in qualities:
+                return qualities[name] > 0
+        return False
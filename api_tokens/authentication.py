@@ -1,8 +1,22 @@
 from rest_framework import authentication, exceptions
-from .models import AccessToken
+from .models import AccessToken, TOKEN_PREFIX_LENGTH, token_digest
+from .token_cache import get_cached_token, cache_token
+from .usage import record_token_usage
 from django.utils import timezone
 
 class CustomTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Bearer token authentication for the API.
+
+    * Tokens are looked up by their short prefix and verified with a
+      constant-time compare of their SHA-256 digest.
+    * Resolved tokens (with their user) are cached for a short time, so most
+      requests do not query the database.
+    * Expiry is checked on every request, revoking or deleting a token
+      invalidates the cache.
+    * Each request is counted for the token usage stats, the counts are
+      written to the database in bulk by a periodic task.
+    """
     keyword = 'Bearer'
 
     def authenticate(self, request):
@@ -23,11 +37,28 @@ class CustomTokenAuthentication(authentication.BaseAuthentication):
             msg = "Invalid token header. Token string should not contain invalid characters."
             raise exceptions.AuthenticationFailed(msg)
 
-        try:
-            token = AccessToken.objects.get(token=token_key, is_revoked=False)
-        except AccessToken.DoesNotExist:
-            raise exceptions.AuthenticationFailed("Invalid or expired token.")
+        digest = token_digest(token_key)
+        token = get_cached_token(digest)
+        if token is None:
+            token = self.lookup_token(token_key, digest)
+            if token is None:
+                raise exceptions.AuthenticationFailed("Invalid or expired token.")
+            cache_token(digest, token)
 
         if token.expires_at < timezone.now():
             raise exceptions.AuthenticationFailed("Token has expired.")
-        return (token.user, token)
\ No newline at end of file
+        record_token_usage(token.pk)
+        return (token.user, token)
+
+    def lookup_token(self, token_key, digest):
+        """
+        Return the active AccessToken matching the token or None.
+
+        * Several tokens can share a prefix, each one is compared.
+        """
+        candidates = AccessToken.objects.select_related('user').filter(
+            prefix=token_key[:TOKEN_PREFIX_LENGTH], is_revoked=False)
+        for token in candidates:
+            if token.matches(digest):
+                return token
+        return None
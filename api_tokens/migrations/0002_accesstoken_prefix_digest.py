@@ -0,0 +1,45 @@
+# Generated by Django 4.2.11 on 2026-10-18 15:20
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def rekey_tokens(apps, schema_editor):
+    """
+    Store the prefix and SHA-256 digest of the existing raw tokens, so the
+    devices keep working without a new token.
+    """
+    AccessToken = apps.get_model('api_tokens', 'AccessToken')
+    tokens = AccessToken.objects.only('id', 'token')
+    for token in tokens.iterator(chunk_size=1000):
+        token.prefix = token.token[:8]
+        token.digest = hashlib.sha256(token.token.encode()).hexdigest()
+        token.save(update_fields=['prefix', 'digest'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_tokens', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accesstoken',
+            name='prefix',
+            field=models.CharField(db_index=True, default='', editable=False, help_text='First characters of the token, used to look it up', max_length=8),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='accesstoken',
+            name='digest',
+            field=models.CharField(default='', editable=False, help_text='SHA-256 digest of the token', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(rekey_tokens),
+        migrations.RemoveField(
+            model_name='accesstoken',
+            name='token',
+        ),
+    ]
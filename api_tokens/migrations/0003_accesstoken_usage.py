@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_tokens', '0002_accesstoken_prefix_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accesstoken',
+            name='last_used_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Last time the token was used', null=True),
+        ),
+        migrations.AddField(
+            model_name='accesstoken',
+            name='request_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False, help_text='Number of requests made with the token'),
+        ),
+    ]
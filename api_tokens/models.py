@@ -1,4 +1,6 @@
 # Python Imports
+import hashlib
+import hmac
 import secrets
 
 # Django Imports
@@ -7,12 +9,27 @@ from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 
+# Number of leading characters of a token stored in clear to look it up
+TOKEN_PREFIX_LENGTH = 8
+
+
+def token_digest(token_key):
+    """
+    SHA-256 hex digest of a raw token string.
+    """
+    return hashlib.sha256(token_key.encode()).hexdigest()
+
+
 class AccessToken(models.Model):
     """
     Access token model to store information about access tokens.
 
     * Token is generated automatically if not provided.
+    * Only a short prefix of the token and its SHA-256 digest are stored,
+      the raw token is available in `raw_token` right after creation only.
     * Expiration time is set to 30 days if not provided.
+    * Usage (last_used_at, request_count) is written in bulk by the
+      `flush_token_usage` task, or by the web processes when Redis is down.
     """
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, related_name='access_tokens',
@@ -21,22 +38,44 @@ class AccessToken(models.Model):
     )
     device_name = models.CharField(
         max_length=100, help_text="Identifier for the device")
-    token = models.CharField(max_length=64, unique=True,
-                             editable=False, help_text="Access token")
+    prefix = models.CharField(max_length=TOKEN_PREFIX_LENGTH, db_index=True, editable=False,
+                              help_text="First characters of the token, used to look it up")
+    digest = models.CharField(max_length=64, editable=False,
+                              help_text="SHA-256 digest of the token")
     created_at = models.DateTimeField(
         auto_now_add=True, help_text="Creation time of the token")
     expires_at = models.DateTimeField(help_text="Expiration time of the token")
     is_revoked = models.BooleanField(
         default=False, help_text="Revocation status")
+    last_used_at = models.DateTimeField(
+        null=True, blank=True, editable=False, help_text="Last time the token was used")
+    request_count = models.PositiveBigIntegerField(
+        default=0, editable=False, help_text="Number of requests made with the token")
+
+    raw_token = None
 
     def save(self, *args, **kwargs):
         # Generate token if not already set
-        if not self.token:
-            self.token = secrets.token_hex(32)  # 64 characters
+        if not self.digest:
+            self.set_token(secrets.token_hex(32))  # 64 characters
         # Set a default expiration if not provided
         if not self.expires_at:
             self.expires_at = timezone.now() + timedelta(days=30)
         super().save(*args, **kwargs)
 
+    def set_token(self, token_key):
+        """
+        Store the prefix and digest of a raw token.
+        """
+        self.raw_token = token_key
+        self.prefix = token_key[:TOKEN_PREFIX_LENGTH]
+        self.digest = token_digest(token_key)
+
+    def matches(self, digest):
+        """
+        Compare the digest of a presented token in constant time.
+        """
+        return hmac.compare_digest(self.digest, digest)
+
     def __str__(self):
-        return f"{self.user.username} - {self.device_name} token"
\ No newline at end of file
+        return f"{self.user.username} - {self.device_name} token"
@@ -0,0 +1,37 @@
+# Python Imports
+import json
+
+# Django Imports
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parse a newline-delimited JSON body (one JSON document per line) into a list.
+
+    * Blank lines are ignored.
+    * Stops with a ParseError as soon as there are more documents than the
+      view's MAX_ALERTS, so an oversized body is never held in memory.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        max_items = getattr(parser_context.get('view'), 'MAX_ALERTS', None)
+        items = []
+        if stream is None:
+            return items
+        for number, line in enumerate(stream, start=1):
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            if max_items is not None and len(items) >= max_items:
+                raise ParseError(f"At most {max_items} alerts can be sent at once.")
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                raise ParseError(f"NDJSON parse error on line {number}: {e}")
+        return items
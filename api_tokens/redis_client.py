@@ -0,0 +1,28 @@
+# Python Imports
+import threading
+
+# Library Imports
+import redis
+from django.conf import settings
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_redis():
+    """
+    Return the Redis client shared by this process, or None when
+    API_REDIS_URL is not set (e.g. in the test suite).
+
+    * Connection errors surface as redis.RedisError when the client is used,
+      callers fall back to their in-process behaviour.
+    """
+    global _client
+    if not settings.API_REDIS_URL:
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = redis.Redis.from_url(
+                settings.API_REDIS_URL, socket_timeout=settings.API_REDIS_TIMEOUT,
+                socket_connect_timeout=settings.API_REDIS_TIMEOUT)
+        return _client
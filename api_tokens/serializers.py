@@ -1,13 +1,12 @@
 # Django Imports
 from rest_framework import serializers
-from django.forms.models import model_to_dict
 from rest_framework_gis.serializers import GeoFeatureModelSerializer
-from geopy.geocoders import Nominatim
 from django.contrib.gis.geos import Point
 from django.contrib.contenttypes.models import ContentType
 
 # Local Imports
 from alerts.models import (Alert, Earthquake, Flood, Fire, Tornado)
+from alerts.tasks import schedule_geocoding
 
 
 HAZARD_MODEL_MAPPING = {
@@ -50,14 +49,10 @@ class ListAlertSerializer(GeoFeatureModelSerializer):
         )
 
     def get_hazard_type(self, obj):
-        if obj.content_type:
-            return obj.content_type.model
-        return None
+        return obj.hazard_type
 
     def get_hazard_details(self, obj):
-        if obj.hazard_details:
-            return model_to_dict(obj.hazard_details)
-        return None
+        return obj.hazard_data
 
 
 class CreateAlertSerializer(serializers.ModelSerializer):
@@ -65,7 +60,7 @@ class CreateAlertSerializer(serializers.ModelSerializer):
     Serializer to create an Alert record.
 
     * Accepts latitude, longitude, hazard type, and hazard data.
-    * Reverse geocodes the location to get country, city, etc.
+    * Queues the reverse geocoding of the location (country, city, etc.).
     * Creates a hazard type instance.
     * Creates an Alert record.
     * Returns the created Alert record.
@@ -108,15 +103,6 @@ class CreateAlertSerializer(serializers.ModelSerializer):
         hazard_type = validated_data.pop("hazard_type", None)
         hazard_data = validated_data.pop("hazard_data", {})
 
-        # Reverse Geocoding using Nominatim
-        try:
-            geolocator = Nominatim(user_agent="enviroalerts")
-            location = geolocator.reverse((lat, lng), language="en")
-            address = location.raw.get("address", {}) if location else {}
-        except Exception as e:
-            raise serializers.ValidationError(
-                {"geocoding": f"Geocoding failed: {str(e)}"})
-
         # Process hazard data (remove empty strings)
         hazard_data = {
             key: (value if not (isinstance(value, str)
@@ -150,10 +136,13 @@ class CreateAlertSerializer(serializers.ModelSerializer):
             effect_radius=validated_data.get("effect_radius"),
             reported_by=user,
             source_url=validated_data.get("source_url"),
-            country=address.get("country", ""),
-            city=address.get("city", address.get("town", "")),
-            county=address.get("county", ""),
+            country="",
+            city="",
+            county="",
             content_type=content_type,
             object_id=object_id,
+            hazard_details=hazard_instance,
         )
+        # Country, city and county are filled in by the geocode_alert task.
+        schedule_geocoding(alert.id)
         return alert
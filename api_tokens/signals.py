@@ -0,0 +1,17 @@
+# Django Imports
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+# Local Imports
+from .models import AccessToken
+from .token_cache import invalidate_tokens
+
+
+@receiver(post_save, sender=AccessToken)
+@receiver(post_delete, sender=AccessToken)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """
+    Drop a token from the authentication cache when it is revoked,
+    changed or deleted.
+    """
+    invalidate_tokens([instance.digest])
@@ -4,6 +4,8 @@ from django.utils import timezone
 
 # Local Imports
 from .models import AccessToken
+from .token_cache import invalidate_tokens
+from .usage import flush_token_usage as flush_redis_token_usage
 
 @shared_task
 def revoke_expired_tokens():
@@ -11,9 +13,20 @@ def revoke_expired_tokens():
     Revoke tokens that have expired.
     
     * This task is run periodically to revoke tokens that have expired.
+    * Revoked tokens are removed from the authentication cache.
     """
     print("Revoking expired tokens...")
     expired_tokens = AccessToken.objects.filter(is_revoked=False, expires_at__lte=timezone.now())
+    expired_digests = list(expired_tokens.values_list('digest', flat=True))
     updated_count = expired_tokens.update(is_revoked=True)
+    invalidate_tokens(expired_digests)
     return f"Revoked {updated_count} tokens."
 
+
+@shared_task
+def flush_token_usage():
+    """
+    Write the token usage (request counts, last use) accumulated in Redis to the tokens.
+    """
+    updated_count = flush_redis_token_usage()
+    return f"Updated the usage of {updated_count} tokens."
@@ -1,17 +1,38 @@
 # Python Imports
-from datetime import timedelta
+import csv
+import gzip
+import io
+import json
+import struct
+from datetime import timedelta, timezone as dt_timezone
+from unittest import skipUnless
 
 # Django Imports
+import redis
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib.gis.geos import Point
 from rest_framework import status
 from rest_framework.test import APITestCase
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
 # Local Imports
 from alerts.models import Alert
+from alerts.geocoding import geocoder
+from alerts.ingest import bulk_create_alerts
+from alerts.export import pyarrow
 from users.models import User
+from api_tokens.models import AccessToken
+from api_tokens.api import BulkCreateAlertsAPIView
+from api_tokens.tasks import revoke_expired_tokens
+from api_tokens.usage import flush_local_token_usage, record_token_usage
+from api_tokens.throttling import RedisScopedRateThrottle, local_cache
+from api_tokens.token_cache import clear_local_cache
 
 
 class ListAlertsAPIViewTest(APITestCase):
@@ -24,6 +45,7 @@ class ListAlertsAPIViewTest(APITestCase):
     """
 
     def setUp(self):
+        cache.clear()
         # Create a test user
         self.user = User.objects.create_user(
             username='testuser',
@@ -70,6 +92,100 @@ class ListAlertsAPIViewTest(APITestCase):
         self.assertIn("properties", feature)
         self.assertIn("description", feature["properties"])
 
+    def test_list_alerts_cursor_pagination(self):
+        """
+        With a cursor, the alerts are returned page by page with a next cursor.
+        """
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url, {'cursor': '', 'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["type"], "FeatureCollection")
+        self.assertEqual(len(response.data["features"]), 2)
+        self.assertIsNotNone(response.data["next_cursor"])
+
+        response = self.client.get(
+            self.url, {'cursor': response.data["next_cursor"], 'page_size': 2})
+        self.assertEqual(len(response.data["features"]), 1)
+        self.assertIsNone(response.data["next_cursor"])
+
+    @override_settings(ALERT_SYNC_COMMIT_LAG=0)
+    def test_list_alerts_delta_sync(self):
+        """
+        With `since`, only the alerts changed since the previous poll are returned,
+        along with the ids of the deleted alerts.
+        """
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url, {'since': ''})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["features"]), 3)
+        self.assertEqual(response.data["deleted"], [])
+        self.assertFalse(response.data["has_more"])
+        cursor = response.data["next_cursor"]
+
+        # Nothing changed
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertEqual(response.data["features"], [])
+        self.assertEqual(response.data["next_cursor"], cursor)
+
+        # One alert archived, one deleted, one created
+        archived, deleted = Alert.objects.order_by('id')[:2]
+        archived.is_active = False
+        archived.save()
+        deleted_id = deleted.id
+        deleted.delete()
+        created = Alert.objects.create(description="New alert", location=Point(1, 1),
+                                       effect_radius=100, reported_by=self.user)
+
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        changed = {feature["id"]: feature["properties"]["is_active"]
+                   for feature in response.data["features"]}
+        self.assertEqual(changed, {archived.id: False, created.id: True})
+        self.assertEqual(response.data["deleted"], [deleted_id])
+
+        # The new cursor does not return the same changes again
+        response = self.client.get(self.url, {'since': response.data["next_cursor"]})
+        self.assertEqual(response.data["features"], [])
+        self.assertEqual(response.data["deleted"], [])
+
+    def test_list_alerts_delta_sync_late_commit(self):
+        """
+        A change committed after the poll with an earlier `updated_at` is
+        still returned by the next poll.
+        """
+        self.client.force_authenticate(user=self.user)
+        cursor = self.client.get(self.url, {'since': ''}).data["next_cursor"]
+
+        late = Alert.objects.order_by('id').first()
+        Alert.objects.filter(pk=late.pk).update(
+            description="Late commit", updated_at=timezone.now() - timedelta(seconds=10))
+
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertIn(late.id, [feature["id"] for feature in response.data["features"]])
+
+    def test_list_alerts_not_modified(self):
+        """
+        A poll with the previous ETag gets a 304 until an alert is deleted.
+        """
+        self.client.force_authenticate(user=self.user)
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Alert.objects.first().delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["features"]), 2)
+
+    def test_list_alerts_delta_sync_invalid_cursor(self):
+        """
+        An invalid `since` cursor returns a 400 error.
+        """
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url, {'since': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIsNone(response.data["next"])
+
     def test_list_alerts_unauthenticated(self):
         """
         An unauthenticated request should be rejected.
@@ -91,6 +207,8 @@ class CreateAlertAPIViewTest(APITestCase):
         fake_token = MagicMock()
         fake_token.user = self.user
         self.client.force_authenticate(user=self.user, token=fake_token)
+        # Start each test with an empty in-process geocoding cache.
+        geocoder.clear()
 
         self.url = reverse('create_alert_api')
         self.valid_data = {
@@ -107,7 +225,7 @@ class CreateAlertAPIViewTest(APITestCase):
             "source_url": "http://example.com"
         }
 
-    @patch("api_tokens.serializers.Nominatim")
+    @patch("alerts.geocoding.Nominatim")
     def test_create_alert_success(self, mock_nominatim):
         """
         Test that a valid POST creates an Alert and returns 201.
@@ -135,7 +253,7 @@ class CreateAlertAPIViewTest(APITestCase):
                          self.valid_data["description"])
         self.assertTrue(Alert.objects.filter(pk=data["id"]).exists())
 
-    @patch("api_tokens.serializers.Nominatim")
+    @patch("alerts.geocoding.Nominatim")
     def test_create_alert_invalid_effect_radius(self, mock_nominatim):
         """
         Test that an invalid effect_radius (e.g., 150000) results in a 400 error.
@@ -159,7 +277,7 @@ class CreateAlertAPIViewTest(APITestCase):
         self.assertIn("The radius of effect cannot exceed",
                       str(response.data.get("effect_radius", "")))
 
-    @patch("api_tokens.serializers.Nominatim")
+    @patch("alerts.geocoding.Nominatim")
     def test_create_alert_invalid_hazard_type(self, mock_nominatim):
         """
         Test that an invalid hazard_type results in a 400 error.
@@ -183,15 +301,562 @@ class CreateAlertAPIViewTest(APITestCase):
         self.assertIn("Invalid hazard type", str(
             response.data.get("hazard_type", "")))
 
-    @patch("api_tokens.serializers.Nominatim")
+    @patch("alerts.geocoding.Nominatim")
     def test_create_alert_geocoding_failure(self, mock_nominatim):
         """
-        Test that a geocoding exception results in a 400 error.
+        Test that a geocoding exception does not fail the creation, the
+        location details are filled in later by the geocode_alert task.
         """
         instance = mock_nominatim.return_value
         instance.reverse.side_effect = Exception("Geocoding error")
         response = self.client.post(
             self.url, data=self.valid_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        instance.reverse.assert_not_called()
+        alert = Alert.objects.get(pk=response.data["id"])
+        self.assertEqual(alert.country, "")
+        self.assertIsNone(alert.geocoded_at)
+
+
+class BulkCreateAlertsAPIViewTest(APITestCase):
+    """
+    Test cases for the BulkCreateAlertsAPIView.
+
+    This test case checks that:
+      - A JSON array of valid alerts is created with a 201 status.
+      - Invalid alerts are reported per item next to the created ones (207).
+      - NDJSON bodies are accepted, and parsing stops once they exceed the limit.
+      - The hazard copy and geocoding are handled for the created alerts.
+      - Too many alerts are rejected.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='gateway',
+            password='testpass',
+            email='gateway@example.com',
+            user_type=1
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('bulk_create_alerts')
+        self.valid_item = {
+            "lat": 40.7128,
+            "lng": -74.0060,
+            "hazard_type": "flood",
+            "hazard_data": {"severity": "major", "water_level": 2.5, "is_flash_flood": "True"},
+            "description": "Gateway flood alert",
+        }
+
+    @patch("alerts.ingest.schedule_geocoding_batch")
+    def test_bulk_create_json_array(self, mock_schedule):
+        response = self.client.post(self.url, [self.valid_item] * 3, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 3)
+        ids = [result["id"] for result in response.data["results"]]
+
+        alerts = Alert.objects.filter(id__in=ids)
+        self.assertEqual(alerts.count(), 3)
+        alert = alerts.first()
+        self.assertEqual(alert.reported_by, self.user)
+        self.assertEqual(alert.hazard_type, 'flood')
+        self.assertEqual(alert.hazard_data['severity'], 'major')
+        self.assertTrue(alert.hazard_data['is_flash_flood'])
+        self.assertEqual(alert.effect_radius, 10000)
+        self.assertIsNotNone(alert.soft_deletion_time)
+        self.assertEqual(list(Alert.objects.search("gateway").filter(id__in=ids)
+                              .values_list('id', flat=True).order_by('id')), sorted(ids))
+        mock_schedule.assert_called_once_with(ids)
+
+    @patch("alerts.ingest.schedule_geocoding_batch")
+    def test_bulk_create_partial_errors(self, mock_schedule):
+        items = [
+            self.valid_item,
+            dict(self.valid_item, hazard_type="meteor"),
+            dict(self.valid_item, hazard_data={"severity": "apocalyptic"}),
+            {"lng": 1},
+        ]
+        response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["created"], 1)
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses, ["created", "error", "error", "error"])
+        self.assertIn("hazard_type", response.data["results"][1]["errors"])
+        self.assertIn("hazard_data", response.data["results"][2]["errors"])
+        self.assertIn("lat", response.data["results"][3]["errors"])
+        self.assertEqual(Alert.objects.count(), 1)
+
+    @patch("alerts.ingest.schedule_geocoding_batch")
+    def test_bulk_create_out_of_range_location(self, mock_schedule):
+        """
+        An out of range coordinate is reported on its item, the valid items are created.
+        """
+        items = [self.valid_item, dict(self.valid_item, lat=95), dict(self.valid_item, lng=-181)]
+        response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses, ["created", "error", "error"])
+        self.assertIn("lat", response.data["results"][1]["errors"])
+        self.assertIn("lng", response.data["results"][2]["errors"])
+        self.assertEqual(Alert.objects.count(), 1)
+
+    @patch("alerts.ingest.schedule_geocoding_batch")
+    def test_bulk_create_ndjson(self, mock_schedule):
+        body = "\n".join(json.dumps(self.valid_item) for _ in range(2)) + "\n"
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Alert.objects.count(), 2)
+
+    def test_bulk_create_too_many_alerts(self):
+        response = self.client.post(
+            self.url, [self.valid_item] * (BulkCreateAlertsAPIView.MAX_ALERTS + 1), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Alert.objects.count(), 0)
+
+    @patch.object(BulkCreateAlertsAPIView, 'MAX_ALERTS', 2)
+    def test_bulk_create_ndjson_too_many_alerts(self):
+        """
+        The NDJSON parser stops at the limit, before reading the rest of the body.
+        """
+        body = "\n".join([json.dumps(self.valid_item)] * 2 + ["not json"]) + "\n"
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn("Geocoding failed", str(
-            response.data.get("geocoding", "")))
+        self.assertEqual(response.data["detail"], "At most 2 alerts can be sent at once.")
+        self.assertEqual(Alert.objects.count(), 0)
+
+
+class ExportAlertsAPIViewTest(APITestCase):
+    """
+    Test cases for the ExportAlertsAPIView.
+
+    This test case checks that:
+      - Alerts are streamed as NDJSON GeoJSON features with flattened hazard fields.
+      - CSV exports have a header row and one row per alert.
+      - The export is gzip compressed only when the client accepts it (q-values included).
+      - GeoParquet exports read back with their geometry, or return 501
+        without pyarrow.
+      - Filters and an unknown output format are validated, dates without
+        an offset are read as UTC.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='analyst',
+            password='testpass',
+            email='analyst@example.com',
+            user_type=1
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('export_alerts')
+        bulk_create_alerts([
+            {"lat": 10, "lng": 20, "description": "Flood export", "hazard_type": "flood",
+             "hazard_data": {"severity": "major", "water_level": 2.5}},
+            {"lat": 11, "lng": 21, "description": "Fire export", "hazard_type": "fire",
+             "hazard_data": {"cause": "Lightning"}},
+        ], self.user, geocode=False)
+
+    def test_export_ndjson(self):
+        """
+        NDJSON lines are GeoJSON features with the hazard fields flattened.
+        """
+        response = self.client.get(self.url, {'hazard_type': 'flood'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        feature = json.loads(lines[0])
+        self.assertEqual(feature['geometry']['coordinates'], [20, 10])
+        self.assertEqual(feature['properties']['water_level'], 2.5)
+        self.assertEqual(feature['properties']['reported_by'], 'analyst')
+        self.assertNotIn('cause', feature['properties'])
+
+    def test_export_csv_gzip(self):
+        """
+        CSV exports are gzip compressed when the client accepts it.
+        """
+        response = self.client.get(self.url, {'output': 'csv'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        rows = list(csv.DictReader(io.StringIO(
+            gzip.decompress(b''.join(response.streaming_content)).decode())))
+        self.assertEqual([row['description'] for row in rows], ["Flood export", "Fire export"])
+        self.assertEqual(rows[1]['cause'], "Lightning")
+        self.assertEqual(rows[1]['water_level'], "")
+
+    def test_export_gzip_refused(self):
+        """
+        gzip;q=0 refuses gzip, the export is sent uncompressed.
+        """
+        response = self.client.get(self.url, {'output': 'csv'}, HTTP_ACCEPT_ENCODING='gzip;q=0, br')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'id,'))
+
+    @skipUnless(pyarrow, "pyarrow is not installed")
+    def test_export_geoparquet(self):
+        """
+        GeoParquet exports read back with one row per alert and a WKB point.
+        """
+        response = self.client.get(self.url, {'output': 'geoparquet'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        table = pyarrow.parquet.read_table(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(json.loads(table.schema.metadata[b'geo'])['primary_column'], 'geometry')
+        rows = table.to_pylist()
+        self.assertEqual([row['description'] for row in rows], ["Flood export", "Fire export"])
+        self.assertEqual(rows[0]['water_level'], 2.5)
+        self.assertEqual(rows[1]['cause'], "Lightning")
+        self.assertEqual(struct.unpack('<BIdd', rows[0]['geometry']), (1, 1, 20.0, 10.0))
+
+    @patch("alerts.export.pyarrow", None)
+    def test_export_geoparquet_unavailable(self):
+        """
+        Without pyarrow the GeoParquet export is not implemented.
+        """
+        response = self.client.get(self.url, {'output': 'geoparquet'})
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+    def test_export_naive_dates(self):
+        """
+        Dates without an offset filter on UTC.
+        """
+        created_at = Alert.objects.get(description="Flood export").created_at
+        since = created_at.astimezone(dt_timezone.utc).replace(tzinfo=None)
+        response = self.client.get(self.url, {'since': since.isoformat(), 'hazard_type': 'flood'})
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 1)
+        response = self.client.get(self.url, {'until': since.isoformat(), 'hazard_type': 'flood'})
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+    def test_export_invalid_parameters(self):
+        """
+        An unknown output format or an invalid date returns a 400 error.
+        """
+        response = self.client.get(self.url, {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class NearbyAlertsAPIViewTest(APITestCase):
+    """
+    Test cases for the NearbyAlertsAPIView.
+
+    This test case checks that only the alerts whose effect radius
+    intersects the requested point or bounding box are returned.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass',
+            email='testuser@example.com',
+            user_type=1
+        )
+        # Roughly 1.1 km per 0.01 degree at the equator.
+        self.close_alert = Alert.objects.create(
+            description="Close alert",
+            location=Point(0.01, 0),
+            effect_radius=5000,
+            reported_by=self.user,
+            is_active=True,
+        )
+        self.far_alert = Alert.objects.create(
+            description="Far alert",
+            location=Point(1, 1),
+            effect_radius=5000,
+            reported_by=self.user,
+            is_active=True,
+        )
+        self.inactive_alert = Alert.objects.create(
+            description="Inactive alert",
+            location=Point(0, 0),
+            effect_radius=5000,
+            reported_by=self.user,
+            is_active=False,
+        )
+        self.url = reverse('alerts_near')
+        self.client.force_authenticate(user=self.user)
+
+    def get_descriptions(self, response):
+        return [feature["properties"]["description"]
+                for feature in response.data["features"]]
+
+    def test_point_inside_effect_radius(self):
+        """
+        A point covered by an alert's effect radius returns only that alert.
+        """
+        response = self.client.get(self.url, {'lat': 0, 'lng': 0})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_descriptions(response), ["Close alert"])
+
+    def test_search_radius_intersection(self):
+        """
+        A search radius reaching another alert's circle includes it.
+        """
+        response = self.client.get(self.url, {'lat': 0.9, 'lng': 0.9, 'radius': 100000})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_descriptions(response), ["Far alert"])
+
+    def test_bbox(self):
+        """
+        A bounding box returns the alerts intersecting it.
+        """
+        response = self.client.get(self.url, {'bbox': '0.5,0.5,2,2'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_descriptions(response), ["Far alert"])
+
+    def test_invalid_parameters(self):
+        """
+        Missing or out of range parameters return a 400 error.
+        """
+        for params in [{}, {'lat': 100, 'lng': 0}, {'lat': 0, 'lng': 'abc'},
+                       {'lat': 0, 'lng': 0, 'radius': 200000}, {'bbox': '1,2,3'}]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unauthenticated(self):
+        """
+        An unauthenticated request should be rejected.
+        """
+        self.client.force_authenticate(user=None)
+        response = self.client.get(self.url, {'lat': 0, 'lng': 0})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class CustomTokenAuthenticationCacheTest(APITestCase):
+    """
+    Test cases for the token authentication cache.
+
+    It verifies that a resolved token is served from the cache, that
+    revoking, deleting or expiring a token invalidates it immediately, that
+    tokens are read from the database when the cache is down and that tokens
+    are stored as a prefix and digest.
+    """
+
+    def setUp(self):
+        cache.clear()
+        clear_local_cache()
+        self.user = User.objects.create_user(
+            username='deviceowner',
+            password='testpass',
+            email='deviceowner@example.com',
+            user_type=1
+        )
+        self.token = AccessToken.objects.create(user=self.user, device_name="ESP8266")
+        self.url = reverse('list_alerts')
+        self.auth_header = f"Bearer {self.token.raw_token}"
+
+    def token_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [q for q in queries if 'api_tokens_accesstoken' in q['sql']]
+
+    def test_token_is_cached(self):
+        """
+        The second request does not query the token table.
+        """
+        self.assertEqual(len(self.token_queries()), 1)
+        self.assertEqual(len(self.token_queries()), 0)
+
+    @patch("api_tokens.token_cache.cache")
+    def test_cache_unavailable(self, mock_cache):
+        """
+        Requests still authenticate from the database when the cache is down.
+        """
+        mock_cache.get.side_effect = redis.ConnectionError
+        mock_cache.set.side_effect = redis.ConnectionError
+        self.assertEqual(len(self.token_queries()), 1)
+        # Kept in process meanwhile
+        self.assertEqual(len(self.token_queries()), 0)
+
+    def test_revoke_invalidates_cache(self):
+        """
+        A revoked token is rejected on the next request.
+        """
+        self.token_queries()
+        self.client.force_login(self.user)
+        self.client.post(reverse('token_revoke', kwargs={'token_id': self.token.id}))
+        self.client.logout()
+        response = self.client.get(self.url, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_delete_invalidates_cache(self):
+        """
+        A deleted token is rejected on the next request.
+        """
+        self.token_queries()
+        self.client.force_login(self.user)
+        self.client.post(reverse('token_delete', kwargs={'token_id': self.token.id}))
+        self.client.logout()
+        response = self.client.get(self.url, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_token_stored_hashed(self):
+        """
+        Only the prefix and digest are stored, tokens sharing a prefix still
+        resolve to the right one and a wrong token is rejected.
+        """
+        raw_token = self.token.raw_token
+        stored = AccessToken.objects.get(pk=self.token.pk)
+        self.assertIsNone(stored.raw_token)
+        self.assertEqual(stored.prefix, raw_token[:8])
+        self.assertNotIn(raw_token, stored.digest)
+
+        other = AccessToken(user=self.user, device_name="Other")
+        other.set_token(raw_token[:8] + "0" * 56)
+        other.save()
+        self.assertEqual(len(self.token_queries()), 1)
+
+        response = self.client.get(self.url, HTTP_AUTHORIZATION=f"Bearer {raw_token[:8]}{'1' * 56}")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_expired_token_rejected(self):
+        """
+        Expiry is checked on cached tokens and revoke_expired_tokens drops them.
+        """
+        self.token_queries()
+        AccessToken.objects.filter(pk=self.token.pk).update(
+            expires_at=timezone.now() - timedelta(minutes=1))
+        revoke_expired_tokens()
+        response = self.client.get(self.url, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TokenUsageTest(APITestCase):
+    """
+    Test cases for the token usage tracking.
+
+    It verifies that authenticated requests are counted without touching the
+    token table, that without Redis the process writes its counts to the
+    tokens once they are old enough, and that last_used_at never goes back.
+    """
+
+    def setUp(self):
+        cache.clear()
+        clear_local_cache()
+        flush_local_token_usage()
+        self.user = User.objects.create_user(
+            username='usageowner',
+            password='testpass',
+            email='usageowner@example.com',
+            user_type=1
+        )
+        self.token = AccessToken.objects.create(user=self.user, device_name="ESP32")
+        self.auth_header = f"Bearer {self.token.raw_token}"
+
+    def make_requests(self, count):
+        for _ in range(count):
+            response = self.client.get(reverse('list_alerts'), HTTP_AUTHORIZATION=self.auth_header)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_usage_is_accumulated(self):
+        """
+        Requests are counted in process, the local flush writes the totals once.
+        """
+        self.make_requests(3)
+        self.token.refresh_from_db()
+        self.assertEqual(self.token.request_count, 0)
+        self.assertIsNone(self.token.last_used_at)
+
+        self.assertEqual(flush_local_token_usage(), 1)
+        self.token.refresh_from_db()
+        self.assertEqual(self.token.request_count, 3)
+        self.assertIsNotNone(self.token.last_used_at)
+
+        # Nothing is counted twice
+        flush_local_token_usage()
+        self.token.refresh_from_db()
+        self.assertEqual(self.token.request_count, 3)
+
+    def test_last_used_never_goes_back(self):
+        """
+        A flush landing after a newer one keeps the newer last use.
+        """
+        latest = timezone.now()
+        AccessToken.objects.filter(pk=self.token.pk).update(last_used_at=latest)
+        record_token_usage(self.token.pk, timestamp=latest.timestamp() - 60)
+        flush_local_token_usage()
+
+        self.token.refresh_from_db()
+        self.assertEqual(self.token.last_used_at, latest)
+        self.assertEqual(self.token.request_count, 1)
+
+    @override_settings(TOKEN_USAGE_LOCAL_FLUSH_INTERVAL=0)
+    def test_usage_flushed_by_requests(self):
+        """
+        Without Redis, the requests themselves write the counts when they are due.
+        """
+        self.make_requests(2)
+        self.token.refresh_from_db()
+        self.assertEqual(self.token.request_count, 2)
+
+
+class RedisScopedRateThrottleTest(APITestCase):
+    """
+    Test cases for the RedisScopedRateThrottle.
+
+    It verifies that the throttle falls back to a process-local
+    ScopedRateThrottle without Redis or when Redis fails, and that the
+    sliding window result and retry delay are used when Redis answers.
+    """
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(
+            username='throttled',
+            password='testpass',
+            email='throttled@example.com',
+            user_type=1
+        )
+        self.request = SimpleNamespace(user=self.user)
+        self.view = SimpleNamespace(throttle_scope='test_scope')
+
+    def make_throttle(self):
+        throttle = RedisScopedRateThrottle()
+        throttle.THROTTLE_RATES = {'test_scope': '2/min'}
+        return throttle
+
+    def test_fallback_without_redis(self):
+        """
+        Without Redis the rate is enforced on the local cache.
+        """
+        results = [self.make_throttle().allow_request(self.request, self.view) for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+
+    @patch("api_tokens.throttling.get_redis")
+    def test_fallback_on_redis_error(self, mock_get_redis):
+        """
+        A Redis error falls back to the local cache, not the (Redis) default cache.
+        """
+        mock_get_redis.return_value = MagicMock()
+        with patch.object(RedisScopedRateThrottle, 'run_script', side_effect=redis.ConnectionError), \
+                patch.object(cache, 'get', side_effect=AssertionError("default cache used")):
+            results = [self.make_throttle().allow_request(self.request, self.view) for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+
+    @patch("api_tokens.throttling.get_redis")
+    def test_sliding_window(self, mock_get_redis):
+        """
+        The script result decides the request and the retry delay.
+        """
+        mock_get_redis.return_value = MagicMock()
+        throttle = self.make_throttle()
+        throttle.timer = lambda: 6030.0  # 30 seconds into a one minute window
+
+        with patch.object(RedisScopedRateThrottle, 'run_script', return_value=[1, 1, 0]) as mock_run:
+            self.assertTrue(throttle.allow_request(self.request, self.view))
+        key = f"throttle_test_scope_{self.user.pk}"
+        self.assertEqual(mock_run.call_args.kwargs['keys'], [f"{key}:100", f"{key}:99"])
+        self.assertEqual(mock_run.call_args.kwargs['args'], [2, 0.5, 120])
+
+        # One request in this window and two in the previous one: blocked
+        # until the previous window weighs 0 (end of this window).
+        with patch.object(RedisScopedRateThrottle, 'run_script', return_value=[0, 1, 2]):
+            self.assertFalse(throttle.allow_request(self.request, self.view))
+        self.assertAlmostEqual(throttle.wait(), 30.0)
+
+        # No request in this window and four in the previous one: allowed
+        # again once the previous window weighs 1/4.
+        with patch.object(RedisScopedRateThrottle, 'run_script', return_value=[0, 0, 4]):
+            self.assertFalse(throttle.allow_request(self.request, self.view))
+        self.assertAlmostEqual(throttle.wait(), 15.0)
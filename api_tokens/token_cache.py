@@ -0,0 +1,101 @@
+# Python Imports
+import logging
+import threading
+import time
+
+# Library Imports
+import redis
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Resolved tokens cached in this process: {cache key: (expiry, token)}
+_local_cache = {}
+_local_lock = threading.Lock()
+LOCAL_CACHE_MAX_ENTRIES = 10000
+
+
+def token_cache_key(digest):
+    """
+    Cache key for the digest of a token.
+
+    * Keyed by digest so raw tokens never end up in the cache backend.
+    """
+    return "api_token:" + digest
+
+
+def get_cached_token(digest):
+    """
+    Return the cached AccessToken (with its user loaded) or None.
+
+    * Checks the in-process cache first, then the shared cache.
+    * Returns None when the shared cache is down, so the token is read from
+      the database.
+    """
+    key = token_cache_key(digest)
+    with _local_lock:
+        entry = _local_cache.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                return entry[1]
+            del _local_cache[key]
+
+    try:
+        token = cache.get(key)
+    except redis.RedisError:
+        logger.warning("Token cache unavailable, reading the token from the database")
+        return None
+    if token is not None:
+        _store_local(key, token)
+    return token
+
+
+def cache_token(digest, token):
+    """
+    Store a resolved AccessToken in the in-process and shared caches.
+
+    * Only kept in process when the shared cache is down.
+    """
+    key = token_cache_key(digest)
+    try:
+        cache.set(key, token, settings.TOKEN_AUTH_CACHE_TTL)
+    except redis.RedisError:
+        logger.warning("Token cache unavailable, the token is only cached in process")
+    _store_local(key, token)
+
+
+def invalidate_tokens(digests):
+    """
+    Remove tokens from the caches, e.g. after a revoke or delete.
+
+    * Other processes drop their in-process copy after at most
+      TOKEN_AUTH_LOCAL_CACHE_TTL seconds.
+    * If the shared cache is down, its copies expire after at most
+      TOKEN_AUTH_CACHE_TTL seconds.
+    """
+    keys = [token_cache_key(digest) for digest in digests]
+    if not keys:
+        return
+    try:
+        cache.delete_many(keys)
+    except redis.RedisError:
+        logger.warning("Token cache unavailable, could not invalidate %s tokens", len(keys))
+    with _local_lock:
+        for key in keys:
+            _local_cache.pop(key, None)
+
+
+def clear_local_cache():
+    """
+    Empty the in-process cache.
+    """
+    with _local_lock:
+        _local_cache.clear()
+
+
+def _store_local(key, token):
+    with _local_lock:
+        if len(_local_cache) >= LOCAL_CACHE_MAX_ENTRIES:
+            _local_cache.clear()
+        _local_cache[key] = (time.monotonic() + settings.TOKEN_AUTH_LOCAL_CACHE_TTL, token)
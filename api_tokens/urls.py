@@ -6,7 +6,8 @@ from drf_yasg import openapi
 
 # Local Imports
 from .views import (RevokeTokenView, ListTokensView, DeleteTokenView)
-from .api import (CreateAlertAPIView, ListAlertsAPIView)
+from .api import (CreateAlertAPIView, ListAlertsAPIView, NearbyAlertsAPIView,
+                  BulkCreateAlertsAPIView, ExportAlertsAPIView)
 
 description = """
 ## Welcome to the EnviroAlert API!
@@ -56,6 +57,12 @@ if (httpResponseCode > 0) {
 }
 ```
 
+**Bulk creation:** send a JSON array of alert bodies (or NDJSON, one body per line,
+with `Content-Type: application/x-ndjson`) to `/api/alerts/bulk/`, up to 1000 alerts per request.
+
+**Bulk export:** `/api/alerts/export/?output=ndjson|csv|geoparquet` returns all the matching
+alerts in one (gzip compressed) download, instead of paging through `/api/list_alerts/`.
+
 For any inquiries, please contact us at [argen1swong@gmail.com](mailto:argen1swong@gmail.com)
 any other admin or ambassador.
 
@@ -68,6 +75,9 @@ any other admin or ambassador.
 api_urlpatterns = [
     path('api/list_alerts/', ListAlertsAPIView.as_view(), name='list_alerts'),
     path('api/create_alert/', CreateAlertAPIView.as_view(), name='create_alert_api'),
+    path('api/alerts/near/', NearbyAlertsAPIView.as_view(), name='alerts_near'),
+    path('api/alerts/bulk/', BulkCreateAlertsAPIView.as_view(), name='bulk_create_alerts'),
+    path('api/alerts/export/', ExportAlertsAPIView.as_view(), name='export_alerts'),
 ]
 
 schema_view = get_schema_view(
@@ -99,4 +109,7 @@ urlpatterns = [
     ),
     path('api/list_alerts/', ListAlertsAPIView.as_view(), name='list_alerts'),
     path('api/create_alert/', CreateAlertAPIView.as_view(), name='create_alert_api'),
+    path('api/alerts/near/', NearbyAlertsAPIView.as_view(), name='alerts_near'),
+    path('api/alerts/bulk/', BulkCreateAlertsAPIView.as_view(), name='bulk_create_alerts'),
+    path('api/alerts/export/', ExportAlertsAPIView.as_view(), name='export_alerts'),
 ]
@@ -0,0 +1,146 @@
+# Python Imports
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+# Library Imports
+import redis
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+# Local Imports
+from .models import AccessToken
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Redis hashes of {token id: requests} and {token id: last used timestamp}
+USAGE_REQUESTS_KEY = "token_usage:requests"
+USAGE_LAST_USED_KEY = "token_usage:last_used"
+FLUSH_BATCH_SIZE = 500
+
+# Usage recorded in this process while Redis is not available:
+# {token id: [requests, last used timestamp]}
+_local_usage = {}
+_local_lock = threading.Lock()
+_local_flushed_at = time.monotonic()
+
+
+def record_token_usage(token_id, timestamp=None):
+    """
+    Count a request made with a token, without writing to the database.
+
+    * Accumulated in two Redis hashes in one round trip, shared by all the
+      workers. `flush_token_usage` writes the totals to the tokens.
+    * Without Redis (not configured or failing), the counts are kept in this
+      process and written to the database by the request that finds them
+      older than TOKEN_USAGE_LOCAL_FLUSH_INTERVAL seconds. Counts still held
+      when the process stops are lost.
+    """
+    timestamp = timestamp or time.time()
+    client = get_redis()
+    if client is not None:
+        try:
+            pipeline = client.pipeline(transaction=False)
+            pipeline.hincrby(USAGE_REQUESTS_KEY, token_id, 1)
+            pipeline.hset(USAGE_LAST_USED_KEY, token_id, timestamp)
+            pipeline.execute()
+            return
+        except redis.RedisError:
+            logger.warning("Could not record the usage of token %s in Redis", token_id)
+
+    with _local_lock:
+        entry = _local_usage.setdefault(token_id, [0, 0.0])
+        entry[0] += 1
+        entry[1] = max(entry[1], timestamp)
+        flush_due = time.monotonic() - _local_flushed_at >= settings.TOKEN_USAGE_LOCAL_FLUSH_INTERVAL
+    if flush_due:
+        flush_local_token_usage()
+
+
+def flush_local_token_usage():
+    """
+    Write the usage kept in this process to the tokens.
+
+    * Returns the number of tokens updated.
+    """
+    global _local_usage, _local_flushed_at
+    with _local_lock:
+        usage, _local_usage = _local_usage, {}
+        _local_flushed_at = time.monotonic()
+    try:
+        return write_token_usage({token_id: tuple(entry) for token_id, entry in usage.items()})
+    except DatabaseError:
+        logger.exception("Lost the usage of %s tokens", len(usage))
+        return 0
+
+
+def take_token_usage():
+    """
+    Return the usage accumulated in Redis as
+    {token id: (requests, last used timestamp)} and reset it.
+
+    * The hashes are read and deleted in one transaction, so no request is
+      lost or counted twice.
+    """
+    client = get_redis()
+    if client is None:
+        return {}
+    try:
+        pipeline = client.pipeline(transaction=True)
+        pipeline.hgetall(USAGE_REQUESTS_KEY)
+        pipeline.hgetall(USAGE_LAST_USED_KEY)
+        pipeline.delete(USAGE_REQUESTS_KEY, USAGE_LAST_USED_KEY)
+        requests, last_used, _ = pipeline.execute()
+    except redis.RedisError:
+        logger.warning("Could not read the token usage from Redis")
+        return {}
+
+    return {
+        int(token_id): (int(count), float(last_used.get(token_id, 0) or 0))
+        for token_id, count in requests.items()
+    }
+
+
+def write_token_usage(usage):
+    """
+    Add usage ({token id: (requests, last used timestamp)}) to the
+    `request_count` and `last_used_at` of the tokens.
+
+    * One UPDATE per batch of FLUSH_BATCH_SIZE tokens, with a CASE per token.
+    * `last_used_at` only moves forward.
+    * Returns the number of tokens updated.
+    """
+    token_ids = sorted(usage)
+    updated = 0
+    for start in range(0, len(token_ids), FLUSH_BATCH_SIZE):
+        batch = token_ids[start:start + FLUSH_BATCH_SIZE]
+        last_used = {token_id: datetime.fromtimestamp(usage[token_id][1], tz=timezone.utc)
+                     for token_id in batch}
+        updated += AccessToken.objects.filter(pk__in=batch).update(
+            request_count=F('request_count') + Case(
+                *[When(pk=token_id, then=Value(usage[token_id][0])) for token_id in batch],
+                default=Value(0),
+            ),
+            # Flushes of other processes may land out of order, never go back in time
+            last_used_at=Case(
+                *[When(pk=token_id, then=Greatest(
+                    Coalesce(F('last_used_at'), Value(last_used[token_id])),
+                    Value(last_used[token_id])))
+                  for token_id in batch],
+                default=F('last_used_at'),
+            ),
+        )
+    return updated
+
+
+def flush_token_usage():
+    """
+    Write the usage accumulated in Redis to the tokens.
+
+    * Returns the number of tokens updated.
+    """
+    return write_token_usage(take_token_usage())
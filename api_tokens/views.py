@@ -89,7 +89,7 @@ class ListTokensView(LoginRequiredMixin, TemplateView):
         token = AccessToken.objects.create(
             user=request.user, device_name=device_name, expires_at=expires_at if expires_at_input else None)
         messages.success(
-            request, f"New token generated for device '{device_name}': {token.token}", extra_tags='token')
+            request, f"New token generated for device '{device_name}': {token.raw_token}", extra_tags='token')
         return redirect(request.path)
 
 
@@ -1,4 +1,6 @@
+import sys
 from pathlib import Path
+from datetime import timedelta
 from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -89,6 +91,52 @@ DATABASES = {
     }
 }
 
+# Cache
+# Redis is shared by all the workers, so cached data and invalidations are global.
+# https://docs.djangoproject.com/en/4.2/topics/cache/#redis
+REDIS_URL = 'redis://localhost:6379'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        # Fail fast when Redis is down instead of hanging the request
+        'OPTIONS': {
+            'socket_connect_timeout': 0.5,
+            'socket_timeout': 0.5,
+        },
+    }
+}
+
+# Redis used directly by the API (token usage counters, throttling), None to keep them in process
+API_REDIS_URL = REDIS_URL
+# Seconds to wait on Redis before falling back
+API_REDIS_TIMEOUT = 0.1
+# Without Redis, each process writes its token usage counts this often (seconds)
+TOKEN_USAGE_LOCAL_FLUSH_INTERVAL = 60
+
+# The test suite runs without a Redis server
+if 'test' in sys.argv:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    API_REDIS_URL = None
+
+# Token authentication cache (seconds)
+TOKEN_AUTH_CACHE_TTL = 60
+TOKEN_AUTH_LOCAL_CACHE_TTL = 5
+
+# Delta sync cursors stay this many seconds behind, so alerts written by a
+# transaction that commits late are not skipped (seconds), see alerts.sync
+ALERT_SYNC_COMMIT_LAG = 60
+
+# Rendered alert list responses cache (seconds), see alerts.caching
+ALERT_RESPONSE_CACHE_TTL = 300
+# Larger responses are served but not cached (bytes)
+ALERT_RESPONSE_CACHE_MAX_BYTES = 5 * 1024 * 1024
+
 # Rest Framework Settings
 # Added custom authentication class for token-based authentication for the API 
 # https://www.django-rest-framework.org/api-guide/throttling/
@@ -97,13 +145,28 @@ REST_FRAMEWORK = {
         'api_tokens.authentication.CustomTokenAuthentication',
     ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.ScopedRateThrottle',
+        'api_tokens.throttling.RedisScopedRateThrottle',  # Limits shared by all the workers
     ],
     'DEFAULT_THROTTLE_RATES': {
         'create_alert': '10/day',  # Limit for this api endpoint to 10 requests per day
+        'bulk_create_alert': '60/hour',  # Bulk ingestion, up to 1000 alerts per request
+        'export_alerts': '20/hour',  # Bulk export of the whole alert set
     }
 }
 
+# Reverse geocoding
+# "nominatim": cached Nominatim lookups
+# "boundaries": offline lookups on the polygons loaded with `manage.py load_boundaries`
+GEOCODING_BACKEND = 'nominatim'
+# Coordinates are snapped to a geohash cell (precision 6 is ~1.2 km x 0.6 km)
+GEOCODING_GEOHASH_PRECISION = 6
+GEOCODING_LRU_SIZE = 1024
+
+# Vote buffering
+# When enabled, votes only record the AlertUserVote row and the counter changes
+# are folded into the Alert and User counters by the flush_vote_deltas task.
+VOTE_BUFFERING = False
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -152,23 +215,38 @@ STATIC_ROOT = BASE_DIR / "local-cdn" / "static"
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Celery Settings
-CELERY_BROKER_URL = 'redis://localhost:6379'
-CELERY_RESULT_BACKEND = 'redis://localhost:6379'
+CELERY_BROKER_URL = REDIS_URL
+CELERY_RESULT_BACKEND = REDIS_URL
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 
 CELERY_BEAT_SCHEDULE = {
-    # Deactivate expired alerts every day at midnight
-    'deactivate-expired-alerts-every-day': {
+    # Deactivate expired alerts every minute, in small batches
+    'deactivate-expired-alerts-every-minute': {
         'task': 'alerts.tasks.deactivate_expired_alerts',
-        'schedule': crontab(minute=0, hour=0),
+        'schedule': crontab(),
+    },
+    # Write the accumulated token usage to the database every minute
+    'flush-token-usage-every-minute': {
+        'task': 'api_tokens.tasks.flush_token_usage',
+        'schedule': crontab(),
     },
     # Revoke expired access tokens every day at midnight
     'revoke-expired-tokens-every-day': {
         'task': 'api_tokens.tasks.revoke_expired_tokens',
         'schedule': crontab(minute=0, hour=0),
     },
+    # Queue geocoding for alerts that were never geocoded every 10 minutes
+    'geocode-pending-alerts-every-10-minutes': {
+        'task': 'alerts.tasks.geocode_pending_alerts',
+        'schedule': crontab(minute='*/10'),
+    },
+    # Fold buffered vote deltas into the vote counters every 15 seconds
+    'flush-vote-deltas-every-15-seconds': {
+        'task': 'alerts.tasks.flush_vote_deltas',
+        'schedule': timedelta(seconds=15),
+    },
     # Check user achievements every day at midnight
     'check-user-achievements-every-day': {
         'task': 'users.tasks.check_user_achievements',
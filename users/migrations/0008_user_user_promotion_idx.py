@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_remove_user_alerts_verified_user_alerts_upvoted'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('user_type', 1)), fields=['alerts_upvoted', 'alerts_created'], name='user_promotion_idx'),
+        ),
+    ]
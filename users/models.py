@@ -43,6 +43,13 @@ class User(AbstractUser):
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email']  # Require email during user creation
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Normal users close to the ambassador promotion thresholds
+            models.Index(fields=['alerts_upvoted', 'alerts_created'], condition=models.Q(user_type=1),
+                         name='user_promotion_idx'),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.get_user_type_display()})"
 
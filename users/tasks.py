@@ -1,10 +1,32 @@
 # Library Frameworks import
 from celery import shared_task
-from django.db.models import Count
 
 # Local Imports
 from .models import User
 
+# A normal user becomes an ambassador with at least 500 upvotes and 20 alerts
+UPVOTE_THRESHOLD = 500
+ALERTS_THRESHOLD = 20
+
+
+def promote_ambassadors(user_ids=None):
+    """
+    Promote the normal users that reached the achievement thresholds to ambassador.
+
+    * A single UPDATE filtered on the thresholds and `user_type=1`, backed by
+      the `user_promotion_idx` partial index, no user is loaded into Python.
+    * `user_ids` limits the check to the users whose counters just changed.
+    * Returns the number of promoted users.
+    """
+    users = User.objects.filter(
+        user_type=1,
+        alerts_upvoted__gte=UPVOTE_THRESHOLD,
+        alerts_created__gte=ALERTS_THRESHOLD,
+    )
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    return users.update(user_type=2)
+
 
 @shared_task
 def check_user_achievements():
@@ -13,15 +35,10 @@ def check_user_achievements():
     and created alerts.
 
     mark users as "ambassador" if they have at least 500 upvotes and 20 alerts.
-    """
-    UPVOTE_THRESHOLD = 500
-    ALERTS_THRESHOLD = 20
-    updated_users = []
 
-    for user in User.objects.all():
-        if user.alerts_upvoted >= UPVOTE_THRESHOLD and user.alerts_created >= ALERTS_THRESHOLD:
-            user.user_type = 2
-            user.save()
-            updated_users.append(user.pk)
-
-    return f"Updated user type for users: {updated_users}"
+    * Users are promoted as soon as a vote or alert changes their counters,
+      this nightly run only catches up on counters changed another way
+      (e.g. in the admin).
+    """
+    promoted = promote_ambassadors()
+    return f"Promoted {promoted} users to ambassador."
@@ -5,6 +5,12 @@ from django.contrib.auth import get_user_model, login, authenticate
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.shortcuts import resolve_url
+from django.contrib.gis.geos import Point
+
+# Local Imports
+from users.tasks import check_user_achievements
+from alerts.models import Alert
+from alerts.votes import apply_vote_delta, VoteDelta
 
 User = get_user_model()
 
@@ -626,3 +632,41 @@ class UserProfileViewTest(TestCase):
         # Ensure the user's email remains unchanged.
         self.user.refresh_from_db()
         self.assertNotEqual(self.user.email, "duplicate@example.com")
+
+
+class UserAchievementsTest(TestCase):
+    """
+    Test case for the ambassador promotion.
+
+    This class verifies that:
+      - The nightly task promotes only normal users past both thresholds.
+      - An upvote that reaches the threshold promotes the alert owner right away.
+    """
+
+    def create_user(self, username, **kwargs):
+        return User.objects.create_user(
+            username=username, password="testpass", email=f"{username}@example.com", **kwargs)
+
+    def test_check_user_achievements(self):
+        qualified = self.create_user("qualified", alerts_upvoted=500, alerts_created=20)
+        few_alerts = self.create_user("few_alerts", alerts_upvoted=900, alerts_created=19)
+        admin = self.create_user("admin_user", user_type=3, alerts_upvoted=500, alerts_created=20)
+
+        self.assertEqual(check_user_achievements(), "Promoted 1 users to ambassador.")
+
+        qualified.refresh_from_db()
+        few_alerts.refresh_from_db()
+        admin.refresh_from_db()
+        self.assertEqual(qualified.user_type, 2)
+        self.assertEqual(few_alerts.user_type, 1)
+        self.assertEqual(admin.user_type, 3)
+
+    def test_promotion_on_upvote(self):
+        owner = self.create_user("owner", alerts_upvoted=499, alerts_created=20)
+        alert = Alert.objects.create(description="Alert", location=Point(0, 0), reported_by=owner)
+
+        apply_vote_delta(alert.pk, owner.pk, VoteDelta(1, 0))
+
+        owner.refresh_from_db()
+        self.assertEqual(owner.alerts_upvoted, 500)
+        self.assertEqual(owner.user_type, 2)